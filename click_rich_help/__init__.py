@@ -1,11 +1,71 @@
-from .core import HelpStylesFormatter, StyledCommand, StyledGroup, StyledMultiCommand
-from .decorators import version_option
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from .cache import CacheStats, HelpCache
+    from .core import (
+        CommandSummary,
+        HelpRecord,
+        HelpStylesFormatter,
+        PlainHelpFormatter,
+        StyleConfig,
+        StyledCommand,
+        StyledGroup,
+        StyledMultiCommand,
+    )
+    from .decorators import version_option
+    from .layout import HelpLayout
+    from .plugins import EntryPointMultiCommand
+    from .tree import render_tree
 
 __all__ = [
+    "CacheStats",
+    "CommandSummary",
+    "EntryPointMultiCommand",
+    "HelpCache",
+    "HelpLayout",
+    "HelpRecord",
     "HelpStylesFormatter",
+    "PlainHelpFormatter",
+    "StyleConfig",
     "StyledGroup",
     "StyledCommand",
     "StyledMultiCommand",
     "version_option",
+    "render_tree",
 ]
 __version__ = "22.1.1"
+
+# submodules are imported on first access so CLIs don't pay for click or rich
+# until they actually use them
+_LAZY_ATTRS = {
+    "CacheStats": "cache",
+    "CommandSummary": "core",
+    "EntryPointMultiCommand": "plugins",
+    "HelpCache": "cache",
+    "HelpLayout": "layout",
+    "HelpRecord": "core",
+    "HelpStylesFormatter": "core",
+    "PlainHelpFormatter": "core",
+    "StyleConfig": "core",
+    "StyledGroup": "core",
+    "StyledCommand": "core",
+    "StyledMultiCommand": "core",
+    "version_option": "decorators",
+    "render_tree": "tree",
+}
+
+
+def __getattr__(name: str) -> Any:
+    try:
+        module = _LAZY_ATTRS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # __import__ rather than importlib so -X importtime reports the submodule
+    __import__(f"{__name__}.{module}")
+    value = getattr(globals()[module], name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted([*globals(), *_LAZY_ATTRS])
@@ -0,0 +1,74 @@
+from pathlib import Path
+from typing import Tuple
+
+import click
+
+from .core import StyledGroup
+from .docs import FORMATS, generate_docs
+
+CONTEXT_SETTINGS = dict(help_option_names=["-h", "--help"], max_content_width=90)
+
+
+@click.group(cls=StyledGroup, context_settings=CONTEXT_SETTINGS)
+def cli() -> None:
+    """Tools for CLIs styled with click-rich-help."""
+
+
+@cli.command()
+@click.argument("command", metavar="MODULE:COMMAND")
+@click.option(
+    "-o",
+    "--output",
+    type=click.Path(file_okay=False),
+    default="docs/cli",
+    show_default=True,
+    help="directory to write pages to",
+)
+@click.option(
+    "-f",
+    "--format",
+    "formats",
+    type=click.Choice(FORMATS),
+    multiple=True,
+    default=FORMATS,
+    show_default=True,
+    help="page formats",
+)
+@click.option("--width", default=100, show_default=True, help="terminal width")
+@click.option("--prog-name", help="name of the root command")
+@click.option("--include-hidden", is_flag=True, help="document hidden commands")
+@click.option("--force", is_flag=True, help="render unchanged commands too")
+@click.option("-j", "--jobs", default=1, show_default=True, help="render processes")
+def docs(
+    command: str,
+    output: str,
+    formats: Tuple[str, ...],
+    width: int,
+    prog_name: str,
+    include_hidden: bool,
+    force: bool,
+    jobs: int,
+) -> None:
+    """Write markdown and html help pages for every subcommand of COMMAND.
+
+    Only commands whose params, help or styles changed since the last run are
+    rendered again.
+    """
+    result = generate_docs(
+        command,
+        Path(output),
+        formats=formats,
+        width=width,
+        prog_name=prog_name,
+        include_hidden=include_hidden,
+        force=force,
+        jobs=jobs,
+    )
+    click.echo(
+        f"rendered {len(result.rendered)}, unchanged {len(result.unchanged)}, "
+        f"removed {len(result.removed)} pages in {output}"
+    )
+
+
+if __name__ == "__main__":
+    cli(prog_name="python -m click_rich_help")
@@ -0,0 +1,161 @@
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, List, NamedTuple, Optional, Tuple
+
+import click
+
+if TYPE_CHECKING:
+    from .layout import HelpLayout
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+    layouts: int = 0
+    reflows: int = 0
+
+
+class HelpCache:
+    """
+    LRU cache of rendered help pages.
+
+    Pass an instance as `help_cache` to `StyledGroup`, `StyledCommand` or
+    `StyledMultiCommand` to reuse help that was already rendered for the same
+    command path, width, color mode and styles.
+
+    The layout of each page is kept too, so a page which is only missing for
+    another width is laid out again instead of rendered, see `HelpLayout`.
+
+    :param maxsize: maximum number of help pages, and of layouts, held before
+        evicting.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be at least 1, got {maxsize}")
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[Any, ...], str]" = OrderedDict()
+        self._layouts: "OrderedDict[Tuple[Any, ...], HelpLayout]" = OrderedDict()
+        # pages are keyed by a weak reference to their command, so the id of a
+        # collected command can't serve its pages to a new one
+        self._refs: "weakref.WeakKeyDictionary[click.Command, weakref.ref[click.Command]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        # references of collected commands whose pages are still to be dropped,
+        # appended by the weakref callback without taking the lock
+        self._collected: "List[weakref.ref[click.Command]]" = []
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._reflows = 0
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def command_ref(self, command: click.Command) -> "weakref.ref[click.Command]":
+        """The weak reference to `command` its pages are keyed by."""
+        with self._lock:
+            ref = self._refs.get(command)
+            if ref is None:
+                ref = weakref.ref(command, self._collected.append)
+                self._refs[command] = ref
+            return ref
+
+    def _drop(self, ref: "weakref.ref[click.Command]") -> int:
+        """Drop the pages and layouts keyed by `ref`, holding the lock."""
+        keys = [key for key in self._entries if key[0] is ref]
+        for key in keys:
+            self._bytes -= sys.getsizeof(self._entries.pop(key))
+        for key in [key for key in self._layouts if key[0] is ref]:
+            self._bytes -= self._layouts.pop(key).nbytes
+        return len(keys)
+
+    def _drop_collected(self) -> None:
+        while self._collected:
+            self._drop(self._collected.pop())
+
+    def get(self, key: Tuple[Any, ...]) -> Optional[str]:
+        with self._lock:
+            self._drop_collected()
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key: Tuple[Any, ...], value: str, reflowed: bool = False) -> None:
+        """Keep the page `value`, counted as a reflow if it was laid out again."""
+        with self._lock:
+            self._drop_collected()
+            if reflowed:
+                self._reflows += 1
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= sys.getsizeof(old)
+            self._entries[key] = value
+            self._bytes += sys.getsizeof(value)
+
+            while len(self._entries) > self.maxsize:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= sys.getsizeof(evicted)
+                self._evictions += 1
+
+    def get_layout(self, key: Tuple[Any, ...]) -> Optional["HelpLayout"]:
+        """Layout kept by `put_layout`."""
+        with self._lock:
+            try:
+                layout = self._layouts[key]
+            except KeyError:
+                return None
+            self._layouts.move_to_end(key)
+            return layout
+
+    def put_layout(self, key: Tuple[Any, ...], layout: "HelpLayout") -> None:
+        with self._lock:
+            old = self._layouts.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._layouts[key] = layout
+            self._bytes += layout.nbytes
+
+            while len(self._layouts) > self.maxsize:
+                _, evicted = self._layouts.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    def invalidate(self, command: click.Command) -> int:
+        """Drop every page rendered for `command`, returning how many were held."""
+        with self._lock:
+            self._drop_collected()
+            ref = self._refs.pop(command, None)
+            return 0 if ref is None else self._drop(ref)
+
+    def clear(self) -> None:
+        """Drop all pages and layouts, keeping the hit/miss counters."""
+        with self._lock:
+            self._entries.clear()
+            self._layouts.clear()
+            self._collected.clear()
+            self._bytes = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            self._drop_collected()
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._entries),
+                bytes=self._bytes,
+                layouts=len(self._layouts),
+                reflows=self._reflows,
+            )
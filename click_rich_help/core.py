@@ -1,35 +1,334 @@
+from __future__ import annotations
+
+import inspect
+import os
 import re
+import shutil
+import sys
+import threading
+from collections import OrderedDict
 from gettext import gettext as _
-from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union, overload
+from importlib import import_module
+from types import MappingProxyType
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Mapping,
+    Match,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+    overload,
+)
+from weakref import WeakKeyDictionary, WeakValueDictionary
 
 import click
-from click.formatting import wrap_text
-from rich.console import Console
-from rich.style import Style
-from rich.theme import Theme
-
-from .utils import _colorize
+from click import formatting
+from click.formatting import iter_rows, term_len, wrap_text
+from click.parser import split_opt
+from click.utils import make_default_short_help
+
+from . import diskcache, trace
+from .cache import HelpCache
+from .layout import (
+    Block,
+    Content,
+    DefinitionList,
+    DefinitionRow,
+    HelpLayout,
+    TextBlock,
+    UsageBlock,
+)
+from .utils import (
+    SGRStyle,
+    _colorize,
+    _colorize_many,
+    _compile_style,
+    _emit,
+    _escape_markup,
+    _needs_render,
+    _parse_markup,
+    _parse_style,
+    _replace_emoji,
+    _split_sgr,
+    _strip_markup,
+)
+
+if TYPE_CHECKING:
+    from rich.console import Console
+    from rich.style import Style
+    from rich.theme import Theme
 
 CLICK_STYLES = ["header", "option", "metavar", "doc_style", "default"]
 
-THEMES = {
-    "default": Theme(
+
+class _LazyTheme:
+    """
+    A `rich.theme.Theme` whose styles are only parsed by rich when they are
+    first used, so the built-in themes don't import rich.
+    """
+
+    inherit = False
+
+    def __init__(self, definitions: Mapping[str, str]):
+        self.definitions = dict(definitions)
+        self._theme: Optional[Theme] = None
+
+    @property
+    def theme(self) -> Theme:
+        if self._theme is None:
+            from rich.theme import Theme
+
+            self._theme = Theme(self.definitions, inherit=False)
+        return self._theme
+
+    @property
+    def styles(self) -> Dict[str, Style]:
+        return self.theme.styles
+
+    @property
+    def config(self) -> str:
+        return self.theme.config
+
+
+# themes may also be given as plain dicts which are only parsed by rich when used
+THEMES: Dict[str, Union[Theme, _LazyTheme, Dict[str, str]]] = {
+    "default": _LazyTheme(
         {
             "header": "bold italic cyan",
             "option": "bold yellow",
             "metavar": "green",
             "default": "dim",
             "required": "dim red",
-        },
-        inherit=False,
+        }
     )
 }
 
 
+def _find_theme(name: str) -> Union[Theme, _LazyTheme]:
+    """Theme registered as `name`, or loaded from a theme file or entry point."""
+    theme = THEMES.get(name)
+    if theme is None:
+        from .themes import load_theme
+
+        theme = load_theme(name)
+    if isinstance(theme, Mapping):
+        theme = _LazyTheme(theme)
+    THEMES[name] = theme
+    return theme
+
+
+def _rich_theme(theme: Union[Theme, _LazyTheme]) -> Theme:
+    return theme.theme if isinstance(theme, _LazyTheme) else theme
+
+
+def _get_theme(name: str) -> Theme:
+    """The `rich.theme.Theme` found by `_find_theme`."""
+    return _rich_theme(_find_theme(name))
+
+
+def _use_theme(name: str) -> Union[Theme, _LazyTheme]:
+    """`_find_theme` for `use_theme`, reporting missing or invalid themes."""
+    try:
+        return _find_theme(name)
+    except KeyError:
+        from .themes import available_themes
+
+        themes = sorted({*THEMES, *available_themes()})
+        raise click.BadParameter(f"{name} isn't one of {themes}")
+    except (OSError, ValueError) as e:
+        raise click.BadParameter(f"Unable to load theme {name}: {e}")
+
+
+def _theme_definitions(theme: Union[Theme, _LazyTheme]) -> List[Union[str, Style]]:
+    if isinstance(theme, _LazyTheme):
+        return list(theme.definitions.values())
+    return list(theme.styles.values())
+
+
+def _check_styles(definitions: Iterable[Any]) -> None:
+    """
+    Validate style definitions as the styled help would, only importing rich
+    for those `_parse_style` can't compile.
+
+    :raises rich.errors.StyleSyntaxError: for an invalid style.
+    """
+    for definition in definitions:
+        if isinstance(definition, str) and _parse_style(definition) is None:
+            from rich.style import Style
+
+            Style.parse(definition)
+
+
+def _invalid_styles(styles: Any) -> ValueError:
+    return ValueError(
+        (
+            f"Invalid styles: {styles}\n\n"
+            "Styles must be a dict containing valid names/styles. "
+            "See rich for more info"
+        )
+    )
+
+
+# environment variables rich consults when picking a color system and width
+CONSOLE_ENV_VARS = ("TERM", "COLORTERM", "NO_COLOR", "FORCE_COLOR", "COLUMNS")
+
+RENDERER_POOL_SIZE = 32
+
+
+class _Renderer(NamedTuple):
+    styles: Dict[str, Union[str, Style]]
+    console: Console
+    sgr_styles: Dict[Hashable, SGRStyle]
+
+
+_renderers: "OrderedDict[Hashable, _Renderer]" = OrderedDict()
+_renderers_lock = threading.Lock()
+
+
+def _freeze(mapping: Optional[Mapping[str, Any]]) -> Optional[Tuple[Any, ...]]:
+    return tuple(sorted(mapping.items())) if mapping else None
+
+
+def _style_fingerprint(
+    styles: Optional[Dict[str, Union[str, Style]]],
+    theme: Optional[Theme],
+    base_theme: Optional[Theme],
+    option_custom_styles: Optional[Dict[str, str]],
+) -> Tuple[Any, ...]:
+    """Hashable key for everything that affects the compiled styles."""
+    return (
+        _freeze(styles),
+        _freeze(theme.styles if theme else None),
+        _freeze(base_theme.styles if base_theme else None),
+        _freeze(option_custom_styles),
+        tuple(os.environ.get(var) for var in CONSOLE_ENV_VARS),
+    )
+
+
+_style_configs: "WeakValueDictionary[Hashable, StyleConfig]" = WeakValueDictionary()
+_style_configs_lock = threading.Lock()
+# siblings are usually created with the fields of the same config in a row
+_last_style_config: Optional[StyleConfig] = None
+
+STYLE_CONFIG_FIELDS = ("styles", "theme", "use_theme", "option_custom_styles")
+
+
+def _mapping_key(mapping: Optional[Mapping[str, Any]]) -> Optional[Tuple[Any, ...]]:
+    return None if mapping is None else tuple(sorted(mapping.items()))
+
+
+class StyleConfig:
+    """
+    Immutable styles of a command, shared by every command styled the same way.
+
+    Creating a config equal to one that is still in use returns that instance,
+    so the commands of large trees don't each hold a copy of their parent's
+    styles. Assigning the styles of a command replaces its config instead.
+    """
+
+    __slots__ = (*STYLE_CONFIG_FIELDS, "__weakref__")
+
+    styles: Optional[Mapping[str, Union[str, Style]]]
+    theme: Optional[Theme]
+    use_theme: Optional[str]
+    option_custom_styles: Optional[Mapping[str, str]]
+
+    def __new__(
+        cls,
+        styles: Mapping[str, Union[str, Style]] = None,
+        theme: Theme = None,
+        use_theme: str = None,
+        option_custom_styles: Mapping[str, str] = None,
+    ) -> "StyleConfig":
+        global _last_style_config
+        last = _last_style_config
+        if (
+            last is not None
+            and type(last) is cls
+            and styles is last.styles
+            and theme is last.theme
+            and use_theme == last.use_theme
+            and option_custom_styles is last.option_custom_styles
+        ):
+            return last
+
+        key: Optional[Hashable]
+        try:
+            # the config holds on to the theme so its id isn't reused
+            key = (
+                cls,
+                _mapping_key(styles),
+                id(theme),
+                use_theme,
+                _mapping_key(option_custom_styles),
+            )
+            hash(key)
+        except (AttributeError, TypeError):
+            # let the formatter report invalid styles
+            key = None
+        else:
+            with _style_configs_lock:
+                config = _style_configs.get(key)
+            if config is not None:
+                _last_style_config = config
+                return config
+
+        config = object.__new__(cls)
+        for name, value in zip(
+            STYLE_CONFIG_FIELDS, (styles, theme, use_theme, option_custom_styles)
+        ):
+            if isinstance(value, Mapping):
+                value = MappingProxyType(dict(value))
+            object.__setattr__(config, name, value)
+
+        if key is not None:
+            with _style_configs_lock:
+                config = _style_configs.setdefault(key, config)
+            _last_style_config = config
+        return config
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable, use replace()")
+
+    def __repr__(self) -> str:
+        fields = ", ".join(
+            f"{name}={getattr(self, name)!r}" for name in STYLE_CONFIG_FIELDS
+        )
+        return f"{type(self).__name__}({fields})"
+
+    def replace(self, **changes: Any) -> "StyleConfig":
+        """Config with some fields changed, leaving this one as it is."""
+        fields = {name: getattr(self, name) for name in STYLE_CONFIG_FIELDS}
+        fields.update(changes)
+        return type(self)(**fields)
+
+
+def _style_property(name: str) -> Any:
+    def get(command: Any) -> Any:
+        return getattr(command.style_config, name)
+
+    def set(command: Any, value: Any) -> None:
+        command.style_config = command.style_config.replace(**{name: value})
+
+    return property(get, set, doc=f"The {name} of `style_config`.")
+
+
 class HelpStylesFormatter(click.HelpFormatter):
     option_regex = re.compile(r"-{1,2}[\w\-]+")
     defaults_regex = re.compile(r"  \[default: (.*)\]")
     required_regex = re.compile(r"  \[required\]")
+    deferred_regex = re.compile(r"\0(\d+)\0")
+    # control characters rich drops, other than \b and tabs which are handled
+    control_regex = re.compile(r"[\x00-\x07\x0b-\x1f\x7f]")
 
     def __init__(
         self,
@@ -43,42 +342,147 @@ class HelpStylesFormatter(click.HelpFormatter):
         base_theme: Optional[Theme]
 
         if not any([styles, theme]):
-            theme = THEMES["default"]
+            theme = _get_theme("default")
         if use_theme:
-            try:
-                base_theme = THEMES[use_theme]
-            except KeyError:
-                raise click.BadParameter(f"{use_theme} isn't one of {THEMES.keys()}")
+            base_theme = _rich_theme(_use_theme(use_theme))
         else:
             base_theme = None
 
-        self.styles = self._get_styles(styles, theme, base_theme=base_theme)
         self.option_custom_styles = option_custom_styles
-        self.console = self._load_console()
+        self._load_renderer(styles, theme, base_theme)
+        # fragments waiting for a batched render, see write_dl
+        self._deferred: Optional[List[Tuple[str, Union[str, Style]]]] = None
+        # styled records, may be shared by formatters with the same styles
+        self.row_cache: Optional[Dict[HelpRecord, Tuple[str, str]]] = None
+        self._reset_layout()
         super(HelpStylesFormatter, self).__init__(*args, **kwargs)
 
+    def _reset_layout(self) -> None:
+        # everything written, kept to lay the page out again, see get_layout
+        self._blocks: List[Block] = []
+        self._style_ids: Dict[str, int] = {"": 0}
+        self._prefixes: List[str] = [""]
+        self._min_width = 0
+        self._max_width: Optional[int] = None
+
+    @property
+    def width(self) -> int:
+        # whatever is computed from the width only fits this width
+        self._restrict_widths(self._width, self._width)
+        return self._width
+
+    @width.setter
+    def width(self, width: int) -> None:
+        self._width = width
+
+    def _restrict_widths(self, min_width: int, max_width: int = None) -> None:
+        """Narrow the widths the page written so far may be laid out at."""
+        self._min_width = max(self._min_width, min_width)
+        if max_width is not None:
+            self._max_width = (
+                max_width
+                if self._max_width is None
+                else min(self._max_width, max_width)
+            )
+
+    def get_layout(self) -> HelpLayout:
+        """
+        Layout of everything written so far, which renders the same help at
+        any width it covers without styling it again.
+        """
+        blocks: List[Block] = []
+        for block in self._blocks:
+            if isinstance(block, str) and blocks and isinstance(blocks[-1], str):
+                blocks[-1] += block
+            else:
+                blocks.append(block)
+        return HelpLayout(blocks, self._prefixes, self._min_width, self._max_width)
+
+    def write(self, string: str) -> None:
+        self._blocks.append(string)
+        self.buffer.append(string)
+
+    def _write_block(self, block: Block) -> None:
+        self._blocks.append(block)
+        self.buffer.append(
+            block
+            if isinstance(block, str)
+            else block.render(self._prefixes, self._width)
+        )
+
+    def _content(self, text: str) -> Content:
+        """Styled `text` with its codes split off for `HelpLayout`."""
+        if "\x1b" not in text:
+            return text
+        split = _split_sgr(text, self._style_ids)
+        self._sync_prefixes()
+        if split is None:
+            return text
+        return split if split.plain else ""
+
+    def _style_id(self, prefix: str) -> int:
+        style_id = self._style_ids.setdefault(prefix, len(self._style_ids))
+        self._sync_prefixes()
+        return style_id
+
+    def _sync_prefixes(self) -> None:
+        if len(self._style_ids) > len(self._prefixes):
+            self._prefixes.extend(list(self._style_ids)[len(self._prefixes) :])
+
+    def _load_renderer(
+        self,
+        styles: Optional[Dict[str, Union[str, Style]]],
+        theme: Optional[Theme],
+        base_theme: Optional[Theme],
+    ) -> None:
+        """Reuse the console and compiled styles of an identically styled formatter."""
+        if styles is not None and not isinstance(styles, Mapping):
+            # let _get_styles report the invalid styles
+            key = None
+        else:
+            key = (
+                type(self),
+                *_style_fingerprint(
+                    styles, theme, base_theme, self.option_custom_styles
+                ),
+            )
+            with _renderers_lock:
+                renderer = _renderers.get(key)
+                if renderer is not None:
+                    _renderers.move_to_end(key)
+                    self.styles, self.console, self.sgr_styles = renderer
+                    return
+
+        with trace.phase("get_styles"):
+            self.styles = self._get_styles(styles, theme, base_theme=base_theme)
+        with trace.phase("console"):
+            self.console = self._load_console()
+        with trace.phase("compile_styles"):
+            self.sgr_styles = self._compile_styles()
+
+        if key is not None:
+            with _renderers_lock:
+                _renderers[key] = _Renderer(self.styles, self.console, self.sgr_styles)
+                while len(_renderers) > RENDERER_POOL_SIZE:
+                    _renderers.popitem(last=False)
+
     def _get_styles(
         self,
         user_styles: Optional[Dict[str, Union[str, Style]]],
         theme: Optional[Theme],
         base_theme: Optional[Theme],
     ) -> Dict[str, Union[str, Style]]:
+        from rich.style import Style
 
         styles: Dict[str, Union[str, Style]] = {k: "none" for k in CLICK_STYLES}
         additions: Dict[str, Union[str, Style]] = {}
         if base_theme:
             additions.update(base_theme.styles)
         if user_styles:
-            if isinstance(user_styles, dict):
+            if isinstance(user_styles, Mapping):
                 additions.update(user_styles)
             else:
-                raise ValueError(
-                    (
-                        f"Invalid styles: {user_styles}\n\n"
-                        "Styles must be a dict containing valid names/styles. "
-                        "See rich for more info"
-                    )
-                )
+                raise _invalid_styles(user_styles)
         if theme:
             additions.update(theme.styles)
 
@@ -93,12 +497,86 @@ class HelpStylesFormatter(click.HelpFormatter):
         return styles
 
     def _load_console(self) -> Console:
+        from rich.console import Console
+        from rich.theme import Theme
+
+        # lines are wrapped by the formatter after styling, see _wrap_styled
         return Console(
             theme=Theme(self.styles, inherit=False),
             highlight=False,
             force_terminal=True,
+            soft_wrap=True,
         )
 
+    def _colorize(self, text: str, style: Union[str, Style], suffix: str = None) -> str:
+        """Style `text` using precompiled codes, deferring to rich for markup."""
+        if trace._active:
+            trace.count_colorize(text)
+        if _needs_render(text):
+            colorized = self._colorize_markup(text, style)
+            if colorized is not None:
+                return colorized + (suffix or "")
+            if self._deferred is not None:
+                self._deferred.append((text, style))
+                return f"\0{len(self._deferred) - 1}\0{suffix or ''}"
+            return _colorize(self.console, text, style, suffix)
+        return _emit(self._sgr(style), text, suffix)
+
+    def _colorize_text(self, text: str, style: Union[str, Style]) -> str:
+        """Style `text` as is, even if it looks like markup."""
+        if trace._active:
+            trace.count_colorize(text)
+        return _emit(self._sgr(style), text)
+
+    def _colorize_markup(self, text: str, style: Union[str, Style]) -> Optional[str]:
+        """Style markup from its cached runs, or ``None`` if rich must render it."""
+        runs = _parse_markup(text)
+        if runs is None:
+            return None
+        return "".join(_emit(self._sgr_tags(style, tags), run) for run, tags in runs)
+
+    def _sgr(self, style: Union[str, Style]) -> SGRStyle:
+        try:
+            return self.sgr_styles[style]
+        except KeyError:
+            sgr = self.sgr_styles[style] = _compile_style(self.console, style)
+            return sgr
+
+    def _sgr_tags(self, style: Union[str, Style], tags: Tuple[str, ...]) -> SGRStyle:
+        """Codes for `style` with markup `tags` applied on top, as rich does."""
+        if not tags:
+            return self._sgr(style)
+        key = (style, *tags)
+        try:
+            return self.sgr_styles[key]
+        except KeyError:
+            from rich.style import Style
+
+            get_style = self.console.get_style
+            combined = get_style(style) + Style.combine(
+                get_style(tag, default=Style.null()) for tag in tags
+            )
+            sgr = self.sgr_styles[key] = _compile_style(self.console, combined)
+            return sgr
+
+    def _compile_styles(self) -> Dict[Hashable, SGRStyle]:
+        from rich.style import Style
+
+        sgr_styles: Dict[Hashable, SGRStyle] = {
+            name: _compile_style(self.console, name) for name in self.styles
+        }
+        for style in (self.option_custom_styles or {}).values():
+            sgr_styles[style] = _compile_style(self.console, style)
+
+        # extras are rendered nested inside of the doc_style
+        doc_style = self.console.get_style("doc_style")
+        for extra in ("default", "required"):
+            sgr_styles[f"doc_style+{extra}"] = _compile_style(
+                self.console,
+                doc_style + self.console.get_style(extra, default=Style.null()),
+            )
+        return sgr_styles
+
     def _get_opt_names(self, option_name: str) -> List[str]:
         opts = self.option_regex.findall(option_name)
         if not opts:
@@ -123,7 +601,7 @@ class HelpStylesFormatter(click.HelpFormatter):
         else:
             return metavar
 
-    def _extract_extras(self, help_txt: str) -> str:
+    def _split_extras(self, help_txt: str) -> Tuple[str, List[Tuple[str, str]]]:
         extras = []
         text = help_txt
 
@@ -131,102 +609,818 @@ class HelpStylesFormatter(click.HelpFormatter):
         default = default[0] if default else None
 
         if default:
-            extras.append(rf"[default]\[default: {default}][/]")
+            extras.append(("default", f"default: {default}"))
             text = self.defaults_regex.sub("", text).rstrip()
 
         required = self.required_regex.findall(help_txt)
         required = required[0] if required else None
 
         if required:
-            extras.append(r"[required]\[required][/]")
+            extras.append(("required", "required"))
             text = self.required_regex.sub("", text).rstrip()
 
-        return f"{text} {' '.join(extras)}"
+        return text, extras
 
-    def _write_definition(self, option_name: str) -> str:
-        metavar = self._extract_metavar_choices(option_name)
+    def _extract_extras(self, help_txt: str) -> str:
+        return self._extras_markup(*self._split_extras(help_txt))
 
-        color = (
+    def _extras_markup(self, text: str, extras: List[Tuple[str, str]]) -> str:
+        labels = "; ".join(
+            f"[{style}]{_escape_markup(label)}[/]"
+            for style, label in self._bracket_extras(extras)
+        )
+        return f"{text}{self._extras_sep(text, extras)}{labels}"
+
+    @staticmethod
+    def _bracket_extras(extras: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """Enclose the labels in one bracket, kept in the first and last styles."""
+        if not extras:
+            return []
+        bracketed = list(extras)
+        style, label = bracketed[0]
+        bracketed[0] = (style, f"[{label}")
+        style, label = bracketed[-1]
+        bracketed[-1] = (style, f"{label}]")
+        return bracketed
+
+    @staticmethod
+    def _extras_sep(text: str, extras: List[Tuple[str, str]]) -> str:
+        return " " if text or not extras else ""
+
+    def _metavar_style(self) -> Union[str, Style]:
+        return (
             self.styles["metavar"]
             if self.styles["metavar"] != "none"
             else self.styles["option"]
         )
 
+    def _write_definition(self, option_name: str) -> str:
+        metavar = self._extract_metavar_choices(option_name)
+
+        color = self._metavar_style()
+
         if not metavar == option_name:
             if "[" in metavar and "]" in metavar:
                 choices = metavar.split("[")[1].split("]")[0].split("|")
                 colorized_metavar = "[{}]".format(
-                    "|".join(
-                        [_colorize(self.console, choice, color) for choice in choices]
-                    )
+                    "|".join([self._colorize(choice, color) for choice in choices])
                 )
             else:
-                colorized_metavar = _colorize(self.console, metavar, color)
+                colorized_metavar = self._colorize(metavar, color)
 
             term = option_name.replace(metavar, "")
-            return (
-                _colorize(self.console, term, self._pick_color(term))
-                + colorized_metavar
-            )
+            return self._colorize(term, self._pick_color(term)) + colorized_metavar
 
         elif "/" in option_name:
             return " / ".join(
                 [
-                    _colorize(self.console, flag.strip(), self._pick_color(option_name))
+                    self._colorize(flag.strip(), self._pick_color(option_name))
                     for flag in option_name.split("/")
                 ]
             )
         else:
 
-            return _colorize(self.console, option_name, self._pick_color(option_name))
+            return self._colorize(option_name, self._pick_color(option_name))
+
+    def _write_record(self, record: HelpRecord) -> Tuple[str, str]:
+        flags = ", ".join(record.flags)
+
+        color = self.styles["option"]
+        if self.option_custom_styles:
+            # the first word of the row is matched for backwards compatibility
+            for flag in (*record.flags, *record.secondary_flags, flags.split()[0]):
+                if flag in self.option_custom_styles:
+                    color = self.option_custom_styles[flag]
+                    break
+
+        if record.secondary_flags:
+            term = (
+                self._colorize(flags, color)
+                + record.separator
+                + self._colorize(", ".join(record.secondary_flags), color)
+            )
+        elif record.metavar is None:
+            term = self._colorize(flags, color)
+        else:
+            term = self._colorize(f"{flags} ", color) + self._write_metavar(record)
+
+        extras = record.extras()
+        help = record.help.rstrip() if extras else record.help
+        return term, self._write_help(help, extras)
+
+    def _write_metavar(self, record: HelpRecord) -> str:
+        style = self._metavar_style()
+        metavar = record.metavar or ""
+        if record.choices is None:
+            return self._colorize(metavar, style)
+
+        choices = "|".join(self._colorize(choice, style) for choice in record.choices)
+        # anything click appended after the choices, i.e. "..." for nargs
+        rest = metavar[len("|".join(record.choices)) + 2 :]
+        return f"[{choices}]" + (self._colorize(rest, style) if rest else "")
 
     def _write_option_help(self, help_txt: str) -> str:
-        return _colorize(self.console, self._extract_extras(help_txt), "doc_style")
+        return self._write_help(*self._split_extras(help_txt))
+
+    def _write_help(self, text: str, extras: List[Tuple[str, str]]) -> str:
+        sep = self._extras_sep(text, extras)
+        labels = "; ".join(label for _, label in extras)
+        plain = f"{text}{sep}[{labels}]" if extras else f"{text}{sep}"
+
+        if "\n" in plain or _needs_render(f"{text} {labels}"):
+            return self._colorize(self._extras_markup(text, extras), "doc_style")
+
+        colorized_extras = [
+            self._colorize_text(
+                label, "doc_style" if style == "doc_style" else f"doc_style+{style}"
+            )
+            for style, label in self._bracket_extras(extras)
+        ]
+        return self._colorize(f"{text}{sep}", "doc_style") + self._colorize(
+            "; ", "doc_style"
+        ).join(colorized_extras)
 
     def write_usage(self, prog: str, args: str = "", prefix: str = None) -> None:
         # TODO: make usage text a style
         if not prefix:
             prefix = "Usage"
-        colorized_prefix = _colorize(self.console, prefix, style="header", suffix=": ")
-        super(HelpStylesFormatter, self).write_usage(
-            _colorize(self.console, prog, "bold"),
-            _colorize(self.console, args, "bold"),
-            prefix=colorized_prefix,
-        )
+        with trace.phase("write_usage"):
+            colorized_prefix = self._colorize(prefix, style="header", suffix=": ")
+            usage_prefix = (
+                f"{colorized_prefix:>{self.current_indent}}"
+                f"{self._colorize(prog, 'bold')} "
+            )
+            # as click lays it out, measuring the prefix without its codes
+            self._write_block(
+                UsageBlock(
+                    usage_prefix,
+                    term_len(usage_prefix),
+                    term_len(colorized_prefix),
+                    self._content(self._colorize(args, "bold")),
+                    self.current_indent,
+                )
+            )
 
     def write_heading(self, heading: str) -> None:
-        colorized_heading = _colorize(self.console, heading, style="header")
+        colorized_heading = self._colorize(heading, style="header")
         super(HelpStylesFormatter, self).write_heading(colorized_heading)
 
     def write_dl(
-        self, rows: Sequence[Tuple[str, str]], col_max: int = 30, col_spacing: int = 2
+        self,
+        rows: Sequence[HelpRow],
+        col_max: int = 30,
+        col_spacing: int = 2,
     ) -> None:
-        colorized_rows: Sequence[Tuple[str, str]] = [
-            (self._write_definition(row[0]), self._write_option_help(row[1]))
-            for row in rows
-        ]
-        super(HelpStylesFormatter, self).write_dl(colorized_rows, col_max, col_spacing)
+        """
+        Write a definition list of `(term, help)` rows, or of `HelpRecord`s
+        which are styled from their fields instead of parsing the row text.
+        """
+        with trace.phase("write_dl"):
+            row_cache = self.row_cache
+            # fragments which need rich are collected and rendered in a single pass
+            self._deferred = []
+            try:
+                colorized_rows: Sequence[Tuple[str, str]] = [
+                    (
+                        row_cache.get(row) or self._write_record(row)
+                        if row_cache is not None
+                        else self._write_record(row)
+                    )
+                    if isinstance(row, HelpRecord)
+                    else (
+                        self._write_definition(row[0]),
+                        self._write_option_help(row[1]),
+                    )
+                    for row in rows
+                ]
+            finally:
+                deferred, self._deferred = self._deferred, None
+
+            if deferred:
+                rendered = _colorize_many(self.console, deferred)
+
+                def fill(match: Match[str]) -> str:
+                    return rendered[int(match.group(1))]
+
+                colorized_rows = [
+                    (
+                        self.deferred_regex.sub(fill, term),
+                        self.deferred_regex.sub(fill, help),
+                    )
+                    for term, help in colorized_rows
+                ]
+
+            if row_cache is not None:
+                for row, colorized in zip(rows, colorized_rows):
+                    if isinstance(row, HelpRecord):
+                        row_cache[row] = colorized
+
+            self._write_columns(colorized_rows, col_max, col_spacing)
+
+    def _write_columns(
+        self, rows: Sequence[Tuple[str, str]], col_max: int, col_spacing: int
+    ) -> None:
+        """
+        Lay out styled rows as click's `write_dl` does, measuring each term
+        once and wrapping the help by its plain text.
+        """
+        term_lens = [term_len(term) for term, _ in rows]
+        self._write_block(
+            DefinitionList(
+                tuple(
+                    DefinitionRow(term, length, self._content(help))
+                    for (term, help), length in zip(iter_rows(rows, 2), term_lens)
+                ),
+                min(max(term_lens, default=0), col_max) + col_spacing,
+                col_spacing,
+                self.current_indent,
+                self._style_id(self._sgr("doc_style").prefix),
+            )
+        )
 
     def write_text(self, text: str) -> None:
 
         indent = " " * self.current_indent
-        self.write(
-            _colorize(
-                self.console,
-                wrap_text(
-                    text,
-                    self.width,
-                    initial_indent=indent,
-                    subsequent_indent=indent,
-                    preserve_paragraphs=True,
-                ),
-                style="doc_style",
+        text = text.expandtabs()
+        if self.control_regex.search(text):
+            # wrapped before styling as rich drops these, only fitting this width
+            self._restrict_widths(self._width, self._width)
+            self.write(
+                self._colorize(
+                    wrap_text(
+                        text,
+                        self._width,
+                        initial_indent=indent,
+                        subsequent_indent=indent,
+                        preserve_paragraphs=True,
+                    ),
+                    style="doc_style",
+                )
+            )
+            self.write("\n")
+            return
+
+        # rich would drop the \b marking paragraphs click mustn't rewrap
+        styled = self._colorize(
+            text.replace("\b", _NO_REWRAP), style="doc_style"
+        ).replace(_NO_REWRAP, "\b")
+        self._write_block(
+            TextBlock(
+                self._content(styled),
+                self.current_indent,
+                self._style_id(self._sgr("doc_style").prefix),
             )
         )
-        self.write("\n")
+
+
+# stands in for \b while rich styles text
+_NO_REWRAP = "\ue000"
+
+
+class PlainHelpFormatter(HelpStylesFormatter):
+    """
+    Lays out help like `HelpStylesFormatter` without any styling, used when
+    the help would be shown without color anyway. Rich is never imported.
+    """
+
+    def __init__(
+        self,
+        styles: Dict[str, Union[str, Style]] = None,
+        theme: Theme = None,
+        option_custom_styles: Dict[str, str] = None,
+        use_theme: str = None,
+        *args: Any,
+        **kwargs: Any,
+    ):
+        # report the themes and styles the styled help would reject
+        definitions = _theme_definitions(_use_theme(use_theme)) if use_theme else []
+        if styles is not None:
+            if not isinstance(styles, Mapping):
+                raise _invalid_styles(styles)
+            definitions.extend(styles.values())
+        if theme:
+            definitions.extend(_theme_definitions(theme))
+        _check_styles(definitions)
+
+        self.option_custom_styles = option_custom_styles
+        self.styles = dict.fromkeys(CLICK_STYLES, "none")
+        self.sgr_styles = {}
+        self._deferred = None
+        self.row_cache = None
+        self._reset_layout()
+        click.HelpFormatter.__init__(self, *args, **kwargs)
+
+    def _colorize(self, text: str, style: Union[str, Style], suffix: str = None) -> str:
+        if trace._active:
+            trace.count_colorize(text)
+        return _replace_emoji(_strip_markup(text)) + (suffix or "")
+
+    def _sgr(self, style: Union[str, Style]) -> SGRStyle:
+        return _NO_STYLE
+
+
+_NO_STYLE = SGRStyle("", "")
+
+
+def _is_plain(ctx: click.Context) -> bool:
+    """Check if help for `ctx` will be shown without color."""
+    return os.environ.get("NO_COLOR", "") != "" or click.utils.should_strip_ansi(
+        sys.stdout, ctx.color
+    )
+
+
+StyledCommandType = Union["StyledGroup", "StyledCommand", "StyledMultiCommand"]
+
+
+class LazyCommand(NamedTuple):
+    """A subcommand of a `StyledGroup` which is imported only when needed."""
+
+    import_path: str
+    short_help: Optional[str] = None
+    hidden: bool = False
+
+    def get_short_help_str(self, limit: int = 45) -> str:
+        return (self.short_help or "").strip()
+
+    def load(self) -> click.Command:
+        module_name, _, attr = self.import_path.partition(":")
+        obj: Any = import_module(module_name)
+        for name in attr.split("."):
+            obj = getattr(obj, name)
+        if not isinstance(obj, click.Command):
+            raise TypeError(f"{self.import_path} is not a click command: {obj!r}")
+        return obj
+
+
+class CommandSummary(NamedTuple):
+    """
+    A subcommand as listed in the help of a multi command.
+
+    A `StyledGroup` or `StyledMultiCommand` defining a
+    ``list_command_summaries(ctx)`` method returning these, or `None` to load
+    the commands after all, lists its subcommands without loading them. Each
+    command with a `group` is written in a section of that name, and `help` is
+    shortened to fit when there is no `short_help`, as click does.
+    """
+
+    name: str
+    short_help: Optional[str] = None
+    hidden: bool = False
+    deprecated: bool = False
+    group: Optional[str] = None
+    help: Optional[str] = None
+
+    def get_short_help_str(self, limit: int = 45) -> str:
+        text = self.short_help or ""
+        if not text and self.help:
+            text = make_default_short_help(self.help, limit)
+        if self.deprecated:
+            text = _("(Deprecated) {text}").format(text=text)
+        return text.strip()
+
+
+# what a multi command lists in its help, without loading it where possible
+ListedCommand = Union[click.Command, LazyCommand, CommandSummary]
+
+
+class HelpRecord(NamedTuple):
+    """
+    Help row of a `click.Option` kept as separate fields, so it can be styled
+    without parsing the text of the row click would render.
+    """
+
+    flags: Tuple[str, ...]
+    secondary_flags: Tuple[str, ...] = ()
+    metavar: Optional[str] = None
+    choices: Optional[Tuple[str, ...]] = None
+    help: str = ""
+    default: Optional[str] = None
+    required: bool = False
+    envvar: Optional[str] = None
+    range: Optional[str] = None
+
+    @property
+    def separator(self) -> str:
+        """What click puts between the flags and the secondary flags."""
+        flags = (*self.flags, *self.secondary_flags)
+        return "; " if any(split_opt(flag)[0] == "/" for flag in flags) else " / "
+
+    def extras(self) -> List[Tuple[str, str]]:
+        """The `(style, label)` of every bracketed extra following the help."""
+        extras = []
+        if self.envvar is not None:
+            extras.append(("doc_style", _("env var: {var}").format(var=self.envvar)))
+        if self.default is not None:
+            extras.append(
+                ("default", _("default: {default}").format(default=self.default))
+            )
+        if self.range is not None:
+            extras.append(("doc_style", self.range))
+        if self.required:
+            extras.append(("required", _("required")))
+        return extras
+
+    @classmethod
+    def from_option(
+        cls, option: click.Option, ctx: click.Context
+    ) -> Optional[HelpRecord]:
+        """Collect what `option.get_help_record(ctx)` would show."""
+        if option.hidden:
+            return None
+
+        metavar = None
+        choices = None
+        if not option.is_flag and not option.count:
+            metavar = option.make_metavar()
+            if option.metavar is None and isinstance(option.type, click.Choice):
+                names = tuple(str(choice) for choice in option.type.choices)
+                if metavar.startswith(f"[{'|'.join(names)}]"):
+                    choices = names
+
+        envvar = None
+        if option.show_envvar:
+            var = option.envvar
+            if (
+                var is None
+                and option.allow_from_autoenv
+                and ctx.auto_envvar_prefix is not None
+                and option.name is not None
+            ):
+                var = f"{ctx.auto_envvar_prefix}_{option.name.upper()}"
+            if var is not None:
+                envvar = var if isinstance(var, str) else ", ".join(map(str, var))
+
+        range = None
+        if isinstance(option.type, click.types._NumberRangeBase) and not (
+            option.count and option.type.min == 0 and option.type.max is None
+        ):
+            range = option.type._describe_range() or None
+
+        return cls(
+            flags=_display_order(option.opts),
+            secondary_flags=_display_order(option.secondary_opts),
+            metavar=metavar,
+            choices=choices,
+            help=option.help or "",
+            default=_default_string(option, ctx),
+            required=option.required,
+            envvar=envvar,
+            range=range,
+        )
+
+
+def _display_order(opts: Sequence[str]) -> Tuple[str, ...]:
+    # same order as click.formatting.join_options, short prefixes first
+    return tuple(sorted(opts, key=lambda opt: len(split_opt(opt)[0])))
+
+
+# records describe number ranges with click's private API, click's own rows are
+# used instead if it goes away
+_RECORD_RANGES = hasattr(
+    getattr(click.types, "_NumberRangeBase", None), "_describe_range"
+)
+
+# click 8.1 leaves `show_default` unset as None, so an option's False beats the
+# context's and a False default of a flag without secondary opts is hidden
+_SHOW_DEFAULT_UNSET = (
+    inspect.signature(click.Option.__init__).parameters["show_default"].default
+)
+
+
+def _default_string(option: click.Option, ctx: click.Context) -> Optional[str]:
+    # resilient parsing avoids type casting failing for the default
+    resilient = ctx.resilient_parsing
+    ctx.resilient_parsing = True
+    try:
+        default_value = option.get_default(ctx, call=False)
+    finally:
+        ctx.resilient_parsing = resilient
+
+    if isinstance(option.show_default, str):
+        return f"({option.show_default})"
+    show_default: Union[bool, str, None]
+    if _SHOW_DEFAULT_UNSET is None:
+        show_default = (
+            ctx.show_default if option.show_default is None else option.show_default
+        )
+    else:
+        show_default = option.show_default or ctx.show_default
+    if default_value is None or not show_default:
+        return None
+
+    if isinstance(default_value, (list, tuple)):
+        default_string = ", ".join(str(d) for d in default_value)
+    elif inspect.isfunction(default_value):
+        default_string = _("(dynamic)")
+    elif option.is_bool_flag and option.secondary_opts:
+        # boolean flags with distinct True/False opts show the opt, not the value
+        default_string = split_opt(
+            (option.opts if option.default else option.secondary_opts)[0]
+        )[1]
+    elif (
+        _SHOW_DEFAULT_UNSET is None
+        and option.is_bool_flag
+        and not option.secondary_opts
+        and not default_value
+    ):
+        default_string = ""
+    else:
+        default_string = str(default_value)
+    return default_string or None
+
+
+HelpRow = Union[Tuple[str, str], HelpRecord]
+
+
+# ctx.meta key of rows reused while rendering many pages, see render_tree
+HELP_ROWS_META_KEY = "click_rich_help.help_rows"
+
+
+def _help_row(
+    param: click.Parameter, ctx: click.Context, formatter: click.HelpFormatter
+) -> Optional[HelpRow]:
+    structured = isinstance(formatter, HelpStylesFormatter)
+    row: Optional[HelpRow]
+    rows = ctx.meta.get(HELP_ROWS_META_KEY)
+    # keyed by name as click creates a new help option for every get_params
+    key = (ctx, param.name, *param.opts, structured)
+    if rows is not None:
+        try:
+            row = rows[key]
+            return row
+        except KeyError:
+            pass
+
+    # options which override get_help_record keep the text row they build
+    if (
+        structured
+        and _RECORD_RANGES
+        and isinstance(param, click.Option)
+        and type(param).get_help_record is click.Option.get_help_record
+    ):
+        row = HelpRecord.from_option(param, ctx)
+    else:
+        row = param.get_help_record(ctx)
+
+    if rows is not None:
+        rows[key] = row
+    return row
+
+
+def _write_rows(formatter: click.HelpFormatter, rows: Sequence[HelpRow]) -> None:
+    # records are only built for a HelpStylesFormatter, see _help_row
+    formatter.write_dl(rows)  # type: ignore[arg-type]
+
+
+def _write_options(
+    command: click.Command, ctx: click.Context, formatter: click.HelpFormatter
+) -> None:
+    with trace.phase("format_options"):
+        params = command.get_params(ctx)
+        opts = [row for row in (_help_row(p, ctx, formatter) for p in params) if row]
+        if opts:
+            with formatter.section(_("Options")):
+                _write_rows(formatter, opts)
+
+
+def _command_summaries(
+    command: click.MultiCommand, ctx: click.Context
+) -> Optional[List[CommandSummary]]:
+    """
+    Summaries of the subcommands of `command` from its optional
+    ``list_command_summaries`` hook, or `None` to load the commands instead.
+    """
+    hook = getattr(command, "list_command_summaries", None)
+    if hook is None:
+        return None
+    with trace.phase("list_command_summaries"):
+        summaries = hook(ctx)
+    return None if summaries is None else list(summaries)
+
+
+def _summary_groups(
+    command_groups: Optional[Mapping[str, Sequence[str]]],
+    commands: Sequence[Tuple[str, ListedCommand]],
+) -> Optional[Dict[str, Sequence[str]]]:
+    """
+    Add the commands listed with a group to `command_groups`, unless they are
+    put in one of the configured groups already.
+    """
+    groups: Dict[str, Sequence[str]] = dict(command_groups or {})
+    configured = {
+        name
+        for names in groups.values()
+        if isinstance(names, (list, tuple))
+        for name in names
+    }
+    for name, cmd in commands:
+        if not isinstance(cmd, CommandSummary) or not cmd.group:
+            continue
+        names = groups.get(cmd.group, ())
+        if name not in configured and isinstance(names, (list, tuple)):
+            groups[cmd.group] = [*names, name]
+    return groups or None
+
+
+def _write_command_groups(
+    command_groups: Optional[Mapping[str, Sequence[str]]],
+    cmds: List[Tuple[str, str]],
+    formatter: click.HelpFormatter,
+) -> Set[int]:
+    """Write the given command groups, returning the rows written."""
+    if not command_groups:
+        return set()
+
+    index = {name: i for i, (name, _) in enumerate(cmds)}
+    grouped: Set[int] = set()
+    for group, rows in _resolve_groups(command_groups, index, "command"):
+        grouped.update(rows)
+        with formatter.section(_(group)):
+            formatter.write_dl([cmds[i] for i in rows])
+
+    return grouped
+
+
+def _write_commands(
+    formatter: click.HelpFormatter,
+    commands: Sequence[Tuple[str, ListedCommand]],
+    command_groups: Optional[Mapping[str, Sequence[str]]] = None,
+) -> None:
+    """Write the command groups and a "Commands" section for the rest."""
+    if not commands:
+        return
+
+    rows = _short_help_rows(formatter, commands)
+    grouped_cmds = _write_command_groups(
+        _summary_groups(command_groups, commands), rows, formatter
+    )
+
+    rows = [row for i, row in enumerate(rows) if i not in grouped_cmds]
+    if rows:
+        with formatter.section(_("Commands")):
+            formatter.write_dl(rows)
+
+
+def _short_help_rows(
+    formatter: click.HelpFormatter,
+    commands: Sequence[Tuple[str, ListedCommand]],
+) -> List[Tuple[str, str]]:
+    """Rows of the short help of `commands`, shortened to fit as click does."""
+    styled = formatter if isinstance(formatter, HelpStylesFormatter) else None
+    width = formatter.width if styled is None else styled._width
+    # allow for 3 times the default spacing
+    longest = max(len(name) for name, _ in commands)
+    rows = [
+        (name, cmd.get_short_help_str(width - 6 - longest)) for name, cmd in commands
+    ]
+
+    if styled is not None:
+        # the rows are the same at any width where no short help is cut off
+        if all(
+            help == cmd.get_short_help_str(sys.maxsize)
+            for (_, help), (_, cmd) in zip(rows, commands)
+        ):
+            styled._restrict_widths(max(len(help) for _, help in rows) + 6 + longest)
+        else:
+            styled._restrict_widths(width, width)
+    return rows
+
+
+def _max_width(ctx: click.Context) -> int:
+    # override click's default max width of 80
+    if ctx.max_content_width is None:
+        return 100
+    return ctx.max_content_width
+
+
+def _new_formatter(
+    command: StyledCommandType, width: Optional[int], max_width: int, plain: bool
+) -> HelpStylesFormatter:
+    formatter_class = PlainHelpFormatter if plain else HelpStylesFormatter
+    return formatter_class(
+        width=width,
+        max_width=max_width,
+        styles=command.styles,
+        theme=command.theme,
+        use_theme=command.use_theme,
+        option_custom_styles=command.option_custom_styles,
+    )
+
+
+def _formatter_width(width: Optional[int], max_width: int) -> int:
+    # as click.HelpFormatter picks its width
+    if width is None:
+        width = formatting.FORCED_WIDTH
+        if width is None:
+            width = max(min(shutil.get_terminal_size().columns, max_width) - 2, 50)
+    return width
+
+
+def _get_help(command: StyledCommandType, ctx: click.Context) -> str:
+    max_width = _max_width(ctx)
+    plain = _is_plain(ctx)
+    cache = command.help_cache
+    help = None
+    if cache is not None:
+        styles = (
+            command.use_theme,
+            *_style_fingerprint(
+                command.styles,
+                command.theme,
+                None,
+                command.option_custom_styles,
+            ),
+        )
+        command_ref = cache.command_ref(command)
+        key = (
+            command_ref,
+            ctx.command_path,
+            ctx.terminal_width
+            or formatting.FORCED_WIDTH
+            or shutil.get_terminal_size().columns,
+            max_width,
+            plain,
+            *styles,
+        )
+        help = cache.get(key)
+        if help is None:
+            # the page at another width only needs laying out again
+            layout_key = (command_ref, ctx.command_path, "layout", plain, *styles)
+            layout = cache.get_layout(layout_key)
+            width = _formatter_width(ctx.terminal_width, max_width)
+            if layout is not None and layout.covers(width):
+                help = layout.render(width).rstrip("\n")
+                cache.put(key, help, reflowed=True)
+
+    if help is None:
+        help_trace = trace.start(ctx.command_path)
+        try:
+            with trace.phase("formatter"):
+                formatter = _new_formatter(
+                    command, ctx.terminal_width, max_width, plain
+                )
+            command.format_help(ctx, formatter)
+            help = formatter.getvalue().rstrip("\n")
+        finally:
+            if help_trace is not None:
+                trace.finish(help_trace)
+        if cache is not None:
+            cache.put(key, help)
+            cache.put_layout(layout_key, formatter.get_layout())
+
+    if diskcache._pending is not None:
+        diskcache._store_pending(help)
+    return help
+
+
+def _with_profile_option(
+    command: StyledCommandType, params: List[click.Parameter]
+) -> List[click.Parameter]:
+    if not command.help_profile:
+        return params
+    # only imported when enabled as it pulls in cProfile and tracemalloc
+    from .profiling import help_profile_option
+
+    return [*params, help_profile_option()]
+
+
+def _resolve_groups(
+    groups: Mapping[str, Sequence[str]], index: Mapping[str, int], kind: str
+) -> List[Tuple[str, List[int]]]:
+    """
+    Look up the rows of each group by exact name, raising a single `ValueError`
+    listing every name missing from `index`.
+    """
+    resolved = []
+    missing = []
+    for group, names in groups.items():
+        if not isinstance(names, (list, tuple)):
+            raise ValueError(
+                f"Expected list of {kind}s, group: {group}, {kind}s: {names}"
+            )
+        rows = []
+        for name in names:
+            if name in index:
+                rows.append(index[name])
+            else:
+                missing.append(name)
+        resolved.append((group, rows))
+
+    if len(missing) == 1:
+        raise ValueError(f"Unable to find {kind} '{missing[0]}' in list of {kind}s")
+    elif missing:
+        names = ", ".join(f"'{name}'" for name in missing)
+        raise ValueError(f"Unable to find {kind}s {names} in list of {kind}s")
+
+    return resolved
 
 
 class StyledGroup(click.Group):
+    styles = _style_property("styles")
+    theme = _style_property("theme")
+    use_theme = _style_property("use_theme")
+    option_custom_styles = _style_property("option_custom_styles")
+
     def __init__(
         self,
         styles: Dict[str, Union[str, Style]] = None,
@@ -235,69 +1429,78 @@ class StyledGroup(click.Group):
         command_groups: Dict[str, str] = None,
         option_groups: Dict[str, str] = None,
         option_custom_styles: Dict[str, str] = None,
+        help_cache: HelpCache = None,
+        help_profile: bool = False,
         *args: Any,
         **kwargs: Any,
     ):
-        self.styles = styles
-        self.theme = theme
-        self.use_theme = use_theme
+        self.style_config = StyleConfig(styles, theme, use_theme, option_custom_styles)
         self.command_groups = command_groups
         self.option_groups = option_groups
-        self.option_custom_styles = option_custom_styles
+        self.help_cache = help_cache
+        self.help_profile = help_profile
+        self.lazy_commands: Dict[str, LazyCommand] = {}
         super(StyledGroup, self).__init__(*args, **kwargs)
 
     @classmethod
     def from_group(cls, group: click.Group) -> "StyledGroup":
-        styled_group = cls()
-
-        for key, value in group.__dict__.items():
-            styled_group.__dict__[key] = value
+        """Styled copy of `group` sharing its commands, params and callback."""
+        styled_group = cls.__new__(cls)
+        styled_group.__dict__.update(
+            style_config=StyleConfig(),
+            command_groups=None,
+            option_groups=None,
+            help_cache=None,
+            help_profile=False,
+            lazy_commands={},
+        )
+        styled_group.__dict__.update(group.__dict__)
         return styled_group
 
     def get_help(self, ctx: click.Context) -> str:
+        return _get_help(self, ctx)
 
-        # override click's default max width of 80
-        if ctx.max_content_width is None:
-            max_width = 100
-        else:
-            max_width = ctx.max_content_width
-
-        formatter = HelpStylesFormatter(
-            width=ctx.terminal_width,
-            max_width=max_width,
-            styles=self.styles,
-            theme=self.theme,
-            use_theme=self.use_theme,
-            option_custom_styles=self.option_custom_styles,
-        )
-        self.format_help(ctx, formatter)
-        return formatter.getvalue().rstrip("\n")
-
-    def _write_command_groups(
-        self, cmds: List[Tuple[str, str]], formatter: click.HelpFormatter
-    ) -> List[Tuple[str, str]]:
-
-        grouped_cmds: List[Tuple[str, str]] = []
-        if self.command_groups:
-            for group, commands in self.command_groups.items():
-                write_cmds: List[Tuple[str, str]] = []
-                if not isinstance(commands, list):
-                    raise ValueError(
-                        f"Expected list of commands, group: {group}, commands: {commands}"
-                    )
-                for command in commands:
-                    try:
-                        cmd = [cmd for cmd in cmds if command in cmd[0]][0]
-                    except IndexError:
-                        raise ValueError(
-                            f"Unable to find command '{command}' in list of commands"
-                        )
-                    write_cmds.append(cmd)
-                grouped_cmds.extend(write_cmds)
-                with formatter.section(_(group)):
-                    formatter.write_dl(write_cmds)
-
-        return grouped_cmds
+    def get_params(self, ctx: click.Context) -> List[click.Parameter]:
+        return _with_profile_option(self, super(StyledGroup, self).get_params(ctx))
+
+    def format_options(
+        self, ctx: click.Context, formatter: click.HelpFormatter
+    ) -> None:
+        _write_options(self, ctx, formatter)
+        with trace.phase("format_commands"):
+            self.format_commands(ctx, formatter)
+
+    def add_lazy_command(
+        self,
+        name: str,
+        import_path: str,
+        short_help: str = None,
+        hidden: bool = False,
+    ) -> None:
+        """
+        Register a subcommand without importing it.
+
+        The group's help is rendered from `short_help` and `hidden`, the command
+        itself is imported once it is invoked or its own help is requested.
+
+        :param name: the name of the subcommand.
+        :param import_path: location of the command as ``"package.module:attr"``.
+        :param short_help: the help shown in the group's list of commands.
+        :param hidden: hide the subcommand from the group's help.
+        """
+        if ":" not in import_path:
+            raise ValueError(
+                f"Expected import path as 'module:attribute', got '{import_path}'"
+            )
+        self.lazy_commands[name] = LazyCommand(import_path, short_help, hidden)
+
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        return sorted({*self.commands, *self.lazy_commands})
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> Optional[click.Command]:
+        if cmd_name not in self.commands and cmd_name in self.lazy_commands:
+            self.add_command(self.lazy_commands[cmd_name].load(), cmd_name)
+        return super(StyledGroup, self).get_command(ctx, cmd_name)
 
     def format_commands(
         self, ctx: click.Context, formatter: click.HelpFormatter
@@ -305,9 +1508,23 @@ class StyledGroup(click.Group):
         """Extra format methods for multi methods that adds all the commands
         after the options.
         """
-        commands = []
+        summaries = _command_summaries(self, ctx)
+        if summaries is not None:
+            _write_commands(
+                formatter,
+                [(cmd.name, cmd) for cmd in summaries if not cmd.hidden],
+                self.command_groups,
+            )
+            return
+
+        commands: List[Tuple[str, Union[click.Command, LazyCommand]]] = []
         for subcommand in self.list_commands(ctx):
-            cmd = self.get_command(ctx, subcommand)
+            cmd: Optional[Union[click.Command, LazyCommand]]
+            if subcommand not in self.commands and subcommand in self.lazy_commands:
+                cmd = self.lazy_commands[subcommand]
+            else:
+                with trace.phase("get_command"):
+                    cmd = self.get_command(ctx, subcommand)
             # What is this, the tool lied about a command.  Ignore it
             if cmd is None:
                 continue
@@ -316,25 +1533,7 @@ class StyledGroup(click.Group):
 
             commands.append((subcommand, cmd))
 
-        # allow for 3 times the default spacing
-        if len(commands):
-            limit = formatter.width - 6 - max(len(cmd[0]) for cmd in commands)
-
-            rows = []
-            for subcommand, cmd in commands:
-                help = cmd.get_short_help_str(limit)
-                rows.append((subcommand, help))
-
-            grouped_cmds = self._write_command_groups(rows, formatter)
-
-            rows = (
-                [row for row in rows if row not in grouped_cmds]
-                if grouped_cmds
-                else rows
-            )
-            if rows:
-                with formatter.section(_("Commands")):
-                    formatter.write_dl(rows)
+        _write_commands(formatter, commands, self.command_groups)
 
     @overload
     def command(self, __func: Callable[..., Any]) -> click.Command:
@@ -350,12 +1549,17 @@ class StyledGroup(click.Group):
         self, *args: Any, **kwargs: Any
     ) -> Union[Callable[[Callable[..., Any]], click.Command], click.Command]:
         kwargs.setdefault("cls", StyledCommand)
-        kwargs.setdefault("styles", self.styles)
-        kwargs.setdefault("theme", self.theme)
-        kwargs.setdefault("use_theme", self.use_theme)
-        kwargs.setdefault("option_custom_styles", self.option_custom_styles)
+        config = self.style_config
+        kwargs.setdefault("styles", config.styles)
+        kwargs.setdefault("theme", config.theme)
+        kwargs.setdefault("use_theme", config.use_theme)
+        kwargs.setdefault("option_custom_styles", config.option_custom_styles)
+        if self.help_cache is not None:
+            kwargs.setdefault("help_cache", self.help_cache)
+        if self.help_profile:
+            kwargs.setdefault("help_profile", True)
         return super(StyledGroup, self).command(
-            group_styles=self.styles, *args, **kwargs
+            group_styles=config.styles, *args, **kwargs
         )
 
     @overload
@@ -372,14 +1576,24 @@ class StyledGroup(click.Group):
         self, *args: Any, **kwargs: Any
     ) -> Union[Callable[[Callable[..., Any]], click.Group], click.Group]:
         kwargs.setdefault("cls", StyledGroup)
-        kwargs.setdefault("styles", self.styles)
-        kwargs.setdefault("theme", self.theme)
-        kwargs.setdefault("use_theme", self.use_theme)
-        kwargs.setdefault("option_custom_styles", self.option_custom_styles)
+        config = self.style_config
+        kwargs.setdefault("styles", config.styles)
+        kwargs.setdefault("theme", config.theme)
+        kwargs.setdefault("use_theme", config.use_theme)
+        kwargs.setdefault("option_custom_styles", config.option_custom_styles)
+        if self.help_cache is not None:
+            kwargs.setdefault("help_cache", self.help_cache)
+        if self.help_profile:
+            kwargs.setdefault("help_profile", True)
         return super(StyledGroup, self).group(*args, **kwargs)
 
 
 class StyledCommand(click.Command):
+    styles = _style_property("styles")
+    theme = _style_property("theme")
+    use_theme = _style_property("use_theme")
+    option_custom_styles = _style_property("option_custom_styles")
+
     def __init__(
         self,
         group_styles: Dict[str, Union[str, Style]] = None,
@@ -388,126 +1602,148 @@ class StyledCommand(click.Command):
         use_theme: str = None,
         option_groups: Dict[str, str] = None,
         option_custom_styles: Dict[str, str] = None,
+        help_cache: HelpCache = None,
+        help_profile: bool = False,
         *args: Any,
         **kwargs: Any,
     ):
 
-        self.styles = {
-            **(group_styles if group_styles else {}),
-            **(styles if styles else {}),
-        }
-        self.theme = theme
-        self.use_theme = use_theme
+        if styles and styles is not group_styles:
+            styles = {**(group_styles if group_styles else {}), **styles}
+        else:
+            styles = group_styles if group_styles else {}
+        self.style_config = StyleConfig(styles, theme, use_theme, option_custom_styles)
         self.option_groups = option_groups
-        self.option_custom_styles = option_custom_styles
+        self.help_cache = help_cache
+        self.help_profile = help_profile
         super(StyledCommand, self).__init__(*args, **kwargs)
 
     @classmethod
     def from_command(cls, command: click.Command) -> "StyledCommand":
-        styled_command = cls()
-        for key, value in command.__dict__.items():
-            styled_command.__dict__[key] = value
+        """Styled copy of `command` sharing its params and callback."""
+        styled_command = cls.__new__(cls)
+        styled_command.__dict__.update(
+            style_config=StyleConfig({}),
+            option_groups=None,
+            help_cache=None,
+            help_profile=False,
+        )
+        styled_command.__dict__.update(command.__dict__)
         return styled_command
 
     def get_help(self, ctx: click.Context) -> str:
+        return _get_help(self, ctx)
 
-        # override click's default max width of 80
-        if ctx.max_content_width is None:
-            max_width = 100
-        else:
-            max_width = ctx.max_content_width
-
-        formatter = HelpStylesFormatter(
-            width=ctx.terminal_width,
-            max_width=max_width,
-            styles=self.styles,
-            theme=self.theme,
-            use_theme=self.use_theme,
-            option_custom_styles=self.option_custom_styles,
-        )
-        self.format_help(ctx, formatter)
-        return formatter.getvalue().rstrip("\n")
+    def get_params(self, ctx: click.Context) -> List[click.Parameter]:
+        return _with_profile_option(self, super(StyledCommand, self).get_params(ctx))
 
     def _write_option_groups(
-        self, opts: List[Tuple[str, str]], formatter: click.HelpFormatter
-    ) -> Union[List[Tuple[str, str]], None]:
-        grouped_opt: List[Tuple[str, str]] = []
-
-        if self.option_groups:
-            for group, params in self.option_groups.items():
-                write_params: List[Tuple[str, str]] = []
-
-                for param in params:
-                    try:
-                        opt = [opt for opt in opts if param in opt[0]][0]
-                    except IndexError:
-                        raise ValueError(
-                            f"Unable to find option '{param}' in list of options"
-                        )
-                    write_params.append(opt)
+        self,
+        opts: List[HelpRow],
+        formatter: click.HelpFormatter,
+        index: Dict[str, int],
+    ) -> Set[int]:
+        """
+        Write the configured option groups, returning the rows written.
 
-                grouped_opt.extend(write_params)
+        `index` maps every flag of an option to the position of its row.
+        """
+        if not self.option_groups:
+            return set()
 
-                with formatter.section(_(group)):
-                    formatter.write_dl(write_params)
+        grouped: Set[int] = set()
+        for group, rows in _resolve_groups(self.option_groups, index, "option"):
+            grouped.update(rows)
+            with formatter.section(_(group)):
+                _write_rows(formatter, [opts[i] for i in rows])
 
-        return grouped_opt
+        return grouped
 
     def format_options(
         self, ctx: click.Context, formatter: click.HelpFormatter
     ) -> None:
         """Writes all the options into the formatter if they exist."""
-        opts = []
+        with trace.phase("format_options"):
+            opts: List[HelpRow] = []
+            index: Dict[str, int] = {}
 
-        for param in self.get_params(ctx):
-            rv = param.get_help_record(ctx)
-            if rv is not None:
-                opts.append(rv)
+            for param in self.get_params(ctx):
+                rv = _help_row(param, ctx, formatter)
+                if rv is not None:
+                    for flag in (*param.opts, *param.secondary_opts):
+                        index.setdefault(flag, len(opts))
+                    opts.append(rv)
 
-        grouped_opt = self._write_option_groups(opts, formatter)
+            grouped_opt = self._write_option_groups(opts, formatter, index)
 
-        opts = [opt for opt in opts if opt not in grouped_opt] if grouped_opt else opts
+            opts = [opt for i, opt in enumerate(opts) if i not in grouped_opt]
 
-        if opts:
-            with formatter.section(_("Options")):
-                formatter.write_dl(opts)
+            if opts:
+                with formatter.section(_("Options")):
+                    _write_rows(formatter, opts)
 
 
 class StyledMultiCommand(click.MultiCommand):
+    styles = _style_property("styles")
+    theme = _style_property("theme")
+    use_theme = _style_property("use_theme")
+    option_custom_styles = _style_property("option_custom_styles")
+
     def __init__(
         self,
         styles: Dict[str, Union[str, Style]] = None,
         theme: Theme = None,
         use_theme: str = None,
         option_custom_styles: Dict[str, str] = None,
+        help_cache: HelpCache = None,
+        help_profile: bool = False,
         *args: Any,
         **kwargs: Any,
     ):
-        self.styles = styles
-        self.theme = theme
-        self.use_theme = use_theme
-        self.option_custom_styles = option_custom_styles
+        self.style_config = StyleConfig(styles, theme, use_theme, option_custom_styles)
+        self.help_cache = help_cache
+        self.help_profile = help_profile
+        # styled copies of resolved commands, dropped with the original command
+        self._styled_commands: WeakKeyDictionary[
+            click.Command, StyledCommandType
+        ] = WeakKeyDictionary()
         super(StyledMultiCommand, self).__init__(*args, **kwargs)
 
     def get_help(self, ctx: click.Context) -> str:
+        return _get_help(self, ctx)
 
-        # override click's default max width of 80
-        if ctx.max_content_width is None:
-            max_width = 100
-        else:
-            max_width = ctx.max_content_width
-
-        formatter = HelpStylesFormatter(
-            width=ctx.terminal_width,
-            max_width=max_width,
-            styles=self.styles,
-            theme=self.theme,
-            use_theme=self.use_theme,
-            option_custom_styles=self.option_custom_styles,
+    def get_params(self, ctx: click.Context) -> List[click.Parameter]:
+        return _with_profile_option(
+            self, super(StyledMultiCommand, self).get_params(ctx)
         )
 
-        self.format_help(ctx, formatter)
-        return formatter.getvalue().rstrip("\n")
+    def format_options(
+        self, ctx: click.Context, formatter: click.HelpFormatter
+    ) -> None:
+        _write_options(self, ctx, formatter)
+        with trace.phase("format_commands"):
+            self.format_commands(ctx, formatter)
+
+    def format_commands(
+        self, ctx: click.Context, formatter: click.HelpFormatter
+    ) -> None:
+        summaries = _command_summaries(self, ctx)
+        if summaries is not None:
+            _write_commands(
+                formatter, [(cmd.name, cmd) for cmd in summaries if not cmd.hidden]
+            )
+            return
+
+        commands = []
+        for subcommand in self.list_commands(ctx):
+            with trace.phase("get_command"):
+                cmd = self.get_command(ctx, subcommand)
+            # What is this, the tool lied about a command.  Ignore it
+            if cmd is None or cmd.hidden:
+                continue
+            commands.append((subcommand, cmd))
+
+        _write_commands(formatter, commands)
 
     def resolve_command(
         self, ctx: click.Context, args: List[str]
@@ -517,19 +1753,28 @@ class StyledMultiCommand(click.MultiCommand):
             ctx, args
         )
 
-        if isinstance(cmd, click.Group):
-            cmd = StyledGroup.from_group(cmd)
-        elif isinstance(cmd, click.Command):
-            cmd = StyledCommand.from_command(cmd)
-
-        if cmd:
-            if not getattr(cmd, "styles", None):
-                cmd.styles = self.styles
-            if not getattr(cmd, "theme", None):
-                cmd.theme = self.theme
-            if not getattr(cmd, "use_theme", None):
-                cmd.use_theme = self.use_theme
-            if not getattr(cmd, "option_custom_styles", None):
-                cmd.option_custom_styles = self.option_custom_styles
+        if cmd is not None:
+            cmd = self._styled_command(cmd)
 
         return cmd_name, cmd, args[1:]
+
+    def _styled_command(self, cmd: click.Command) -> StyledCommandType:
+        styled = self._styled_commands.get(cmd)
+        if styled is None:
+            if isinstance(cmd, click.Group):
+                styled = StyledGroup.from_group(cmd)
+            else:
+                styled = StyledCommand.from_command(cmd)
+            self._styled_commands[cmd] = styled
+
+        # inherited on every resolve so later changes to either side are seen
+        styled.style_config = StyleConfig(
+            *(
+                getattr(cmd, name, None) or getattr(self, name)
+                for name in STYLE_CONFIG_FIELDS
+            )
+        )
+        help_cache = getattr(cmd, "help_cache", None)
+        styled.help_cache = self.help_cache if help_cache is None else help_cache
+        styled.help_profile = getattr(cmd, "help_profile", False) or self.help_profile
+        return styled
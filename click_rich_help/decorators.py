@@ -1,11 +1,104 @@
+import os
 import re
-from typing import Callable
+from typing import TYPE_CHECKING, Any, Callable, Dict, Mapping, Optional, Tuple
 
 from click import version_option as click_version_option
 from click.decorators import FC
-from rich.console import Console
 
-from .utils import _colorize
+from .utils import (
+    SGRStyle,
+    _colorize,
+    _compile_style,
+    _emit,
+    _needs_render,
+    _parse_style,
+    _strip_markup,
+)
+
+if TYPE_CHECKING:
+    from rich.console import Console
+
+_PLACEHOLDER_RE = re.compile(r"(%\(version\)s|%\(prog\)s)")
+
+_NO_STYLE = SGRStyle("", "")
+
+
+class _VersionMessage(str):
+    """
+    Version message which is only styled once click formats it with ``%``,
+    i.e. when the version is actually shown.
+
+    Styles are compiled to ANSI codes without rich where possible.
+    """
+
+    message_style: Optional[str]
+    prog_name_style: Optional[str]
+    version_style: Optional[str]
+    _console: Optional["Console"]
+    _rendered: Dict[Tuple[Any, ...], str]
+
+    def __new__(
+        cls,
+        message: str,
+        message_style: str = None,
+        prog_name_style: str = None,
+        version_style: str = None,
+    ) -> "_VersionMessage":
+        self = super().__new__(cls, message)
+        self.message_style = message_style
+        self.prog_name_style = prog_name_style
+        self.version_style = version_style
+        self._console = None
+        self._rendered = {}
+        return self
+
+    def __mod__(self, values: Any) -> str:
+        key = (tuple(sorted(values.items())), os.environ.get("NO_COLOR"))
+        try:
+            return self._rendered[key]
+        except KeyError:
+            message = self._rendered[key] = self._render(values)
+            return message
+
+    def _load_console(self) -> "Console":
+        if self._console is None:
+            from rich.console import Console
+
+            # click strips the codes when not writing to a terminal
+            self._console = Console(
+                force_terminal=True, highlight=False, soft_wrap=True
+            )
+        return self._console
+
+    def _style(self, text: str, style: Optional[str], plain: bool) -> str:
+        if _needs_render(text):
+            if plain:
+                return _strip_markup(text)
+            return _colorize(self._load_console(), text, style)
+        if plain or not style:
+            return text
+        sgr = _parse_style(style)
+        if sgr is None:
+            sgr = _compile_style(self._load_console(), style)
+        return _emit(sgr, text)
+
+    def _render(self, values: Mapping[str, Any]) -> str:
+        plain = bool(os.environ.get("NO_COLOR"))
+        parts = []
+        for fragment in _PLACEHOLDER_RE.split(str(self)):
+            if fragment == "%(prog)s":
+                text = str(values["prog"])
+                style = self.prog_name_style or self.message_style
+            elif fragment == "%(version)s":
+                text = str(values["version"])
+                style = self.version_style or self.message_style
+            elif fragment:
+                text = fragment % values
+                style = self.message_style
+            else:
+                continue
+            parts.append(self._style(text, style, plain))
+        return "".join(parts)
 
 
 def version_option(
@@ -24,23 +117,13 @@ def version_option(
 
     for other params see Click's version_option decorator:
     https://click.palletsprojects.com/en/8.0.x/api/#click.version_option
-    """
-    console = Console(highlight=False)
-    msg_parts = []
-    for s in re.split(r"(%\(version\)s|%\(prog\)s)", message):
-        if s == "%(prog)s":
-            msg_parts.append(
-                _colorize(console, prog_name, prog_name_style or message_style)
-            )
-        elif s == "%(version)s":
-            msg_parts.append(
-                _colorize(console, version, version_style or message_style)
-            )
-        else:
-            msg_parts.append(_colorize(console, s, message_style))
-
-    message = "".join(msg_parts)
 
+    The message is styled when the version is shown, rather than when the
+    command is defined.
+    """
     return click_version_option(
-        version=version, prog_name=prog_name, message=message, **kwargs
+        version=version,
+        prog_name=prog_name,
+        message=_VersionMessage(message, message_style, prog_name_style, version_style),
+        **kwargs,
     )
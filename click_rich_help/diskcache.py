@@ -0,0 +1,247 @@
+"""
+Persistent help cache which can answer `--help` before rich is imported.
+
+Call `serve_help` at the top of your CLI's module, before importing click or
+the styled classes:
+
+    from click_rich_help.diskcache import serve_help
+
+    serve_help(__file__, help_option_names=["-h", "--help"])
+
+On a cache hit the stored help is written to stdout and the process exits.
+Otherwise the help rendered by the styled classes is stored for next time.
+
+Only the standard library may be imported here.
+"""
+import hashlib
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Union
+
+# same pattern click uses to strip styles when not writing to a terminal
+_ANSI_RE = re.compile(r"\033\[[;?0-9]*[a-zA-Z]")
+
+# environment variables that change how help is colored or wrapped
+_ENV_VARS = ("TERM", "COLORTERM", "NO_COLOR", "FORCE_COLOR", "COLUMNS")
+
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+
+# temporary files older than this were abandoned by a crashed writer
+_STALE_TMP_SECONDS = 60 * 60
+
+
+class _Pending(NamedTuple):
+    cache: "DiskHelpCache"
+    name: str
+    source_digest: str
+    key_digest: str
+    color: bool
+
+
+_pending: Optional[_Pending] = None
+
+
+def cache_dir(*parts: str) -> Path:
+    """Directory under ``$XDG_CACHE_HOME`` used for click-rich-help caches."""
+    root = os.environ.get("CLICK_RICH_HELP_CACHE_DIR")
+    if not root:
+        root = os.path.join(
+            os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+            "click-rich-help",
+        )
+    return Path(root, *parts)
+
+
+def atomic_write(path: Path, data: bytes) -> None:
+    """Write `data` so concurrent readers only ever see a complete file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _digest(*parts: object) -> str:
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+class DiskHelpCache:
+    """
+    Rendered help pages stored as one file per page.
+
+    File names are ``<name>-<source digest>-<key digest>.txt`` so that pages
+    from an outdated version of a CLI can be found and pruned.
+
+    :param directory: where to store pages, defaults to `cache_dir("help")`.
+    :param max_bytes: total size of pages kept before the oldest are pruned.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.directory = Path(directory) if directory else cache_dir("help")
+        self.max_bytes = max_bytes
+
+    def _path(self, name: str, source_digest: str, key_digest: str) -> Path:
+        return self.directory / f"{name}-{source_digest[:16]}-{key_digest[:32]}.txt"
+
+    def lookup(self, name: str, source_digest: str, key_digest: str) -> Optional[str]:
+        try:
+            return self._path(name, source_digest, key_digest).read_text("utf-8")
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    def store(self, name: str, source_digest: str, key_digest: str, help: str) -> None:
+        try:
+            atomic_write(
+                self._path(name, source_digest, key_digest), help.encode("utf-8")
+            )
+            self.prune(name, source_digest)
+        except OSError:
+            # a read-only or full cache should never break --help
+            pass
+
+    def _entries(self) -> List[os.DirEntry]:  # type: ignore[type-arg]
+        try:
+            with os.scandir(self.directory) as it:
+                return list(it)
+        except FileNotFoundError:
+            return []
+
+    def prune(self, name: str = None, source_digest: str = None) -> None:
+        """
+        Remove pages for other sources of `name`, abandoned temporary files and
+        the oldest pages once the cache holds more than `max_bytes`.
+        """
+        stale_prefix = f"{name}-" if name else None
+        current_prefix = f"{name}-{source_digest[:16]}-" if source_digest else None
+        now = time.time()
+
+        sized = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+                if entry.name.startswith(".tmp-"):
+                    if now - stat.st_mtime > _STALE_TMP_SECONDS:
+                        os.unlink(entry.path)
+                elif (
+                    stale_prefix
+                    and entry.name.startswith(stale_prefix)
+                    and not entry.name.startswith(current_prefix or stale_prefix)
+                ):
+                    os.unlink(entry.path)
+                else:
+                    sized.append((stat.st_mtime, stat.st_size, entry.path))
+            except FileNotFoundError:
+                # another process pruned it first
+                continue
+
+        total = sum(size for _, size, _ in sized)
+        for _, size, path in sorted(sized):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self) -> None:
+        for entry in self._entries():
+            try:
+                os.unlink(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+def _source_digest(sources: Iterable[Union[str, Path]]) -> str:
+    from . import __version__
+
+    stats = []
+    for source in sources:
+        stat = os.stat(source)
+        stats.append((os.path.abspath(source), stat.st_mtime_ns, stat.st_size))
+    return _digest(__version__, sys.version_info[:2], stats)
+
+
+def serve_help(
+    sources: Union[str, Path, Sequence[Union[str, Path]]],
+    name: str = None,
+    args: Sequence[str] = None,
+    help_option_names: Sequence[str] = ("--help",),
+    color: bool = None,
+    cache: DiskHelpCache = None,
+) -> None:
+    """
+    Print the cached help and exit if this invocation asks for help seen before.
+
+    :param sources: path(s) of the module(s) defining the CLI, their mtimes and
+        sizes invalidate the cache.
+    :param name: cache namespace, defaults to the program name.
+    :param args: command line arguments, defaults to ``sys.argv[1:]``.
+    :param help_option_names: the help options of the CLI.
+    :param color: force color on or off, defaults to whether stdout is a terminal.
+    :param cache: cache to use, defaults to a `DiskHelpCache` under `cache_dir`.
+    """
+    global _pending
+
+    if os.environ.get("CLICK_RICH_HELP_CACHE", "1") == "0":
+        return
+
+    args = sys.argv[1:] if args is None else list(args)
+    if "--" in args:
+        args = args[: args.index("--")]
+    if not any(arg in help_option_names for arg in args):
+        return
+
+    if isinstance(sources, (str, Path)):
+        sources = [sources]
+    name = name or os.path.basename(sys.argv[0]) or "cli"
+    if color is None:
+        color = sys.stdout.isatty()
+
+    cache = cache or DiskHelpCache()
+    try:
+        source_digest = _source_digest(sources)
+    except OSError:
+        return
+    key_digest = _digest(
+        args,
+        shutil.get_terminal_size().columns,
+        color,
+        [os.environ.get(var) for var in _ENV_VARS],
+    )
+
+    help = cache.lookup(name, source_digest, key_digest)
+    if help is not None:
+        sys.stdout.write(help + "\n")
+        sys.stdout.flush()
+        raise SystemExit(0)
+
+    _pending = _Pending(cache, name, source_digest, key_digest, color)
+
+
+def _store_pending(help: str) -> None:
+    """Store the first help rendered after a `serve_help` cache miss."""
+    global _pending
+
+    pending, _pending = _pending, None
+    if pending is None:
+        return
+    if not pending.color:
+        help = _ANSI_RE.sub("", help)
+    pending.cache.store(pending.name, pending.source_digest, pending.key_digest, help)
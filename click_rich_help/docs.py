@@ -0,0 +1,202 @@
+"""
+Markdown and HTML reference pages for every command of a styled CLI.
+
+Pages are only rendered again when the command they document changed, see
+`generate_docs` or ``python -m click_rich_help docs --help``.
+"""
+import hashlib
+import io
+import json
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Sequence, Union
+
+import click
+
+from . import __version__
+from .core import LazyCommand, _style_fingerprint
+from .diskcache import atomic_write
+from .tree import _root_context, _walk, render_tree
+
+MANIFEST_NAME = ".click-rich-help-manifest.json"
+
+FORMATS = ("md", "html")
+
+
+class DocsResult(NamedTuple):
+    rendered: List[str]
+    unchanged: List[str]
+    removed: List[str]
+
+
+def _json_default(obj: Any) -> str:
+    # the repr of a callable holds its address, its help only shows "(dynamic)"
+    if callable(obj):
+        return getattr(obj, "__qualname__", type(obj).__qualname__)
+    return repr(obj)
+
+
+def _command_digest(ctx: click.Context, children: List[click.Context]) -> str:
+    """Hash of everything the help page of `ctx.command` is rendered from."""
+    command = ctx.command
+    # the base implementation so groups don't include their whole subtree
+    info = click.Command.to_info_dict(command, ctx)
+    info["commands"] = [
+        (child.info_name, child.command.short_help, child.command.help)
+        for child in children
+    ]
+    info["groups"] = [
+        getattr(command, "option_groups", None),
+        getattr(command, "command_groups", None),
+    ]
+    # inherited from the parent contexts as well as the command's settings
+    info["context"] = [
+        ctx.show_default,
+        ctx.help_option_names,
+        ctx.max_content_width,
+        ctx.auto_envvar_prefix,
+    ]
+    info["styles"] = [
+        getattr(command, "use_theme", None),
+        *_style_fingerprint(
+            getattr(command, "styles", None),
+            getattr(command, "theme", None),
+            None,
+            getattr(command, "option_custom_styles", None),
+        ),
+    ]
+    data = json.dumps(info, default=_json_default, sort_keys=True)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def _page_name(command_path: str) -> str:
+    return "-".join(command_path.split())
+
+
+def _markdown(command_path: str, help: str) -> str:
+    return f"# {command_path}\n\n```\n{help}\n```\n"
+
+
+def _html(command_path: str, help: str, width: int) -> str:
+    from rich.console import Console
+    from rich.text import Text
+
+    console = Console(
+        record=True,
+        file=io.StringIO(),
+        width=width,
+        force_terminal=True,
+        color_system="truecolor",
+    )
+    console.print(Text.from_ansi(help))
+    return console.export_html(inline_styles=True)
+
+
+def _index(pages: Dict[str, str], formats: Sequence[str]) -> str:
+    ext = "md" if "md" in formats else formats[0]
+    links = [f"- [{path}]({_page_name(path)}.{ext})" for path in pages]
+    return "# Commands\n\n" + "\n".join(links) + "\n"
+
+
+def generate_docs(
+    cli: Union[click.Command, str],
+    output: Union[str, Path],
+    formats: Sequence[str] = FORMATS,
+    width: int = 100,
+    prog_name: str = None,
+    include_hidden: bool = False,
+    force: bool = False,
+    jobs: int = 1,
+) -> DocsResult:
+    """
+    Write a page per command of `cli` to `output`, skipping unchanged commands.
+
+    A manifest in `output` records a hash of each command's params, help and
+    styles, commands with the same hash as the last run are not rendered.
+
+    :param cli: the root command or its import path as ``module:attribute``.
+    :param output: directory to write the pages to.
+    :param formats: ``"md"`` for plain help in markdown and/or ``"html"`` for
+        styled help exported by rich.
+    :param width: terminal width to render at.
+    :param prog_name: name of the root command, defaults to `cli.name`.
+    :param include_hidden: also document hidden commands.
+    :param force: render every page, ignoring the manifest.
+    :param jobs: number of processes to render with, see `render_tree`.
+    """
+    unknown = set(formats) - set(FORMATS)
+    if not formats or unknown:
+        raise ValueError(f"formats must be some of {FORMATS}, got {formats}")
+
+    output = Path(output)
+    command = LazyCommand(cli).load() if isinstance(cli, str) else cli
+
+    contexts = list(_walk(_root_context(command, True, prog_name), include_hidden))
+    digests = {
+        ctx.command_path: _command_digest(
+            ctx, [child for child in contexts if child.parent is ctx]
+        )
+        for ctx in contexts
+    }
+    # the version, width and formats change every page
+    settings = [__version__, width, sorted(formats)]
+
+    manifest_path = output / MANIFEST_NAME
+    try:
+        manifest = json.loads(manifest_path.read_text("utf-8"))
+    except (OSError, ValueError):
+        manifest = {}
+    if force or manifest.get("settings") != settings:
+        manifest = {"settings": settings, "pages": {}}
+    old_pages: Dict[str, str] = manifest["pages"]
+
+    changed = [
+        path
+        for path, digest in digests.items()
+        if old_pages.get(path) != digest
+        or not all((output / f"{_page_name(path)}.{ext}").exists() for ext in formats)
+    ]
+
+    if changed:
+
+        def render(color: bool) -> Dict[str, Dict[int, str]]:
+            return render_tree(
+                cli,
+                widths=(width,),
+                color=color,
+                prog_name=prog_name,
+                include_hidden=include_hidden,
+                jobs=jobs,
+                only=set(changed),
+            )
+
+        styled = render(True) if "html" in formats else {}
+        plain = render(False) if "md" in formats else {}
+        for path in changed:
+            name = _page_name(path)
+            if "md" in formats:
+                text = _markdown(path, plain[path][width])
+                atomic_write(output / f"{name}.md", text.encode("utf-8"))
+            if "html" in formats:
+                text = _html(path, styled[path][width], width)
+                atomic_write(output / f"{name}.html", text.encode("utf-8"))
+
+    removed = [path for path in old_pages if path not in digests]
+    for path in removed:
+        for ext in FORMATS:
+            try:
+                (output / f"{_page_name(path)}.{ext}").unlink()
+            except FileNotFoundError:
+                pass
+
+    index = _index(digests, formats)
+    atomic_write(output / "index.md", index.encode("utf-8"))
+    manifest["pages"] = digests
+    atomic_write(
+        manifest_path, json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8")
+    )
+
+    return DocsResult(
+        rendered=changed,
+        unchanged=[path for path in digests if path not in changed],
+        removed=removed,
+    )
@@ -0,0 +1,201 @@
+"""
+Help pages laid out for any width without styling them again.
+
+`HelpStylesFormatter` records everything it writes as a `HelpLayout`: the text
+which click wraps (the usage line, paragraphs and definition lists) is kept as
+`StyledText`, plain text with runs numbered into a table of SGR codes, and
+everything else as the strings written. `HelpLayout.render` only lays the
+blocks out for a width, so a help page shown at another width skips styling
+and extracting extras entirely.
+"""
+import sys
+from typing import NamedTuple, Optional, Sequence, Tuple, Union
+
+from click.formatting import wrap_text
+
+from .utils import StyledText, _join_runs, _wrap_runs
+
+# text with SGR codes split off, or a string click wraps as is
+Content = Union[StyledText, str]
+
+
+def _wrap(
+    content: Content,
+    prefixes: Sequence[str],
+    width: int,
+    initial_indent: str = "",
+    subsequent_indent: str = "",
+    preserve_paragraphs: bool = False,
+    base_style: int = 0,
+) -> str:
+    if isinstance(content, str):
+        return wrap_text(
+            content, width, initial_indent, subsequent_indent, preserve_paragraphs
+        )
+    wrapped = _wrap_runs(
+        content,
+        prefixes,
+        width,
+        initial_indent,
+        subsequent_indent,
+        preserve_paragraphs,
+        prefixes[base_style],
+    )
+    if wrapped is None:
+        # click's layout of the styled text, as for text with other escapes
+        return wrap_text(
+            _join_runs(content, prefixes),
+            width,
+            initial_indent,
+            subsequent_indent,
+            preserve_paragraphs,
+        )
+    return wrapped
+
+
+class UsageBlock(NamedTuple):
+    """The usage line, laid out as `click.HelpFormatter.write_usage` does."""
+
+    prefix: str
+    prefix_len: int
+    heading_len: int
+    args: Content
+    indent: int
+
+    def render(self, prefixes: Sequence[str], width: int) -> str:
+        text_width = width - self.indent
+        if text_width >= self.prefix_len + 20:
+            # the arguments are wrapped behind blanks as wide as the prefix
+            indent = " " * self.prefix_len
+            wrapped = _wrap(self.args, prefixes, text_width, indent, indent)
+            usage = self.prefix + wrapped[self.prefix_len :] if wrapped else ""
+        else:
+            indent = " " * (max(self.indent, self.heading_len) + 4)
+            wrapped = _wrap(self.args, prefixes, text_width, indent, indent)
+            usage = f"{self.prefix}\n{wrapped}"
+        return f"{usage}\n"
+
+
+class TextBlock(NamedTuple):
+    """Paragraphs written by `click.HelpFormatter.write_text`."""
+
+    text: Content
+    indent: int
+    base_style: int = 0
+
+    def render(self, prefixes: Sequence[str], width: int) -> str:
+        indent = " " * self.indent
+        wrapped = _wrap(
+            self.text, prefixes, width, indent, indent, True, self.base_style
+        )
+        return f"{wrapped}\n"
+
+
+class DefinitionRow(NamedTuple):
+    term: str
+    term_len: int
+    help: Content
+
+
+class DefinitionList(NamedTuple):
+    """
+    Rows written by `click.HelpFormatter.write_dl`, with the width of the
+    first column measured once.
+    """
+
+    rows: Tuple[DefinitionRow, ...]
+    first_col: int
+    col_spacing: int
+    indent: int
+    base_style: int = 0
+
+    def render(self, prefixes: Sequence[str], width: int) -> str:
+        first_col = self.first_col
+        text_width = max(width - first_col - 2, 10)
+        indent = " " * (first_col + self.indent)
+        lines = []
+        for term, term_len, help in self.rows:
+            lines.append(f"{'':>{self.indent}}{term}")
+            if not help:
+                lines.append("\n")
+                continue
+            if term_len <= first_col - self.col_spacing:
+                lines.append(" " * (first_col - term_len))
+            else:
+                lines.append(f"\n{indent}")
+
+            wrapped = _wrap(help, prefixes, text_width, "", "", True, self.base_style)
+            help_lines = wrapped.splitlines()
+            if help_lines:
+                lines.append(f"{help_lines[0]}\n")
+                lines.extend(f"{indent}{line}\n" for line in help_lines[1:])
+            else:
+                lines.append("\n")
+        return "".join(lines)
+
+
+Block = Union[str, UsageBlock, TextBlock, DefinitionList]
+
+
+class HelpLayout:
+    """
+    A help page which can be rendered at any width between `min_width` and
+    `max_width` without styling it again, see `HelpStylesFormatter.get_layout`.
+
+    :param blocks: strings written as is and blocks laid out for a width.
+    :param prefixes: SGR codes of each style id used by the blocks.
+    :param min_width: narrowest width the page may be rendered at.
+    :param max_width: widest width the page may be rendered at, if limited.
+    """
+
+    __slots__ = ("blocks", "prefixes", "min_width", "max_width")
+
+    def __init__(
+        self,
+        blocks: Sequence[Block],
+        prefixes: Sequence[str] = ("",),
+        min_width: int = 0,
+        max_width: Optional[int] = None,
+    ):
+        self.blocks = tuple(blocks)
+        self.prefixes = tuple(prefixes)
+        self.min_width = min_width
+        self.max_width = max_width
+
+    def covers(self, width: int) -> bool:
+        """Check if the page is the same at `width` as when it was recorded."""
+        return self.min_width <= width and (
+            self.max_width is None or width <= self.max_width
+        )
+
+    def render(self, width: int) -> str:
+        """Lay the page out for a formatter `width`, as the formatter would."""
+        if not self.covers(width):
+            raise ValueError(
+                f"Layout covers widths {self.min_width} to {self.max_width}, "
+                f"not {width}"
+            )
+        prefixes = self.prefixes
+        return "".join(
+            block if isinstance(block, str) else block.render(prefixes, width)
+            for block in self.blocks
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the layout."""
+        total = sys.getsizeof(self.blocks) + sys.getsizeof(self.prefixes)
+        for block in self.blocks:
+            if isinstance(block, str):
+                total += sys.getsizeof(block)
+                continue
+            contents = [getattr(block, "args", None), getattr(block, "text", None)]
+            if isinstance(block, DefinitionList):
+                for row in block.rows:
+                    contents.extend([row.term, row.help])
+            for content in contents:
+                if isinstance(content, str):
+                    total += sys.getsizeof(content)
+                elif content is not None:
+                    total += sum(map(sys.getsizeof, content))
+        return total
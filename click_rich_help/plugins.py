@@ -0,0 +1,163 @@
+"""
+Subcommands discovered from an entry point group.
+
+`EntryPointMultiCommand` lists every entry point of a group as a subcommand:
+
+    [tool.poetry.plugins."my_cli.commands"]
+    fit = "my_plugin.cli:fit"
+
+Scanning the installed distributions for entry points and importing every
+plugin to read its help is slow, so the names, import paths and help of the
+plugins are kept in a manifest under ``$XDG_CACHE_HOME/click-rich-help``. It is
+built once per environment and rebuilt when a site-packages directory on
+`sys.path` is modified, which is what installing, upgrading or removing a
+distribution does to the directory holding its ``.dist-info``. Other entries of
+`sys.path`, such as the current directory, don't affect it. Plugins are
+imported only when they are invoked or their own help is requested.
+"""
+import hashlib
+import json
+import os
+import site
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import click
+
+from . import __version__
+from .core import CommandSummary, LazyCommand, StyledMultiCommand
+from .diskcache import atomic_write, cache_dir
+from .utils import _entry_points
+
+
+class _Plugin(NamedTuple):
+    import_path: str
+    summary: CommandSummary
+
+
+def _site_dirs() -> List[str]:
+    """The directories of `sys.path` distributions are installed in."""
+    # virtualenvs made by old versions of virtualenv have no getsitepackages
+    site_dirs = set(getattr(site, "getsitepackages", lambda: [])())
+    if site.ENABLE_USER_SITE:
+        site_dirs.add(site.getusersitepackages())
+    return [
+        path
+        for path in sys.path
+        if path in site_dirs
+        or os.path.basename(path) in ("site-packages", "dist-packages")
+    ]
+
+
+def _site_mtimes() -> List[Any]:
+    mtimes = []
+    for path in _site_dirs():
+        try:
+            mtimes.append([path, os.stat(path).st_mtime_ns])
+        except OSError:
+            mtimes.append([path, None])
+    return mtimes
+
+
+class EntryPointMultiCommand(StyledMultiCommand):
+    """
+    A `StyledMultiCommand` whose subcommands are the entry points of
+    `entry_point_group`, listed from a cached manifest.
+
+    :param entry_point_group: the group plugins register their commands in.
+    """
+
+    def __init__(self, entry_point_group: str, *args: Any, **kwargs: Any):
+        self.entry_point_group = entry_point_group
+        self._plugins: Optional[Dict[str, _Plugin]] = None
+        super(EntryPointMultiCommand, self).__init__(*args, **kwargs)
+
+    @property
+    def manifest_path(self) -> Path:
+        """Location of the manifest of this environment's plugins."""
+        name = hashlib.sha256(
+            repr((sys.prefix, sys.executable, self.entry_point_group)).encode()
+        ).hexdigest()
+        return cache_dir("plugins", f"{name}.json")
+
+    def refresh(self) -> None:
+        """Scan the entry points again, e.g. after editing a plugin's help."""
+        self._plugins = self._build_manifest(self._manifest_key())
+
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        return sorted(self._get_plugins())
+
+    def list_command_summaries(self, ctx: click.Context) -> List[CommandSummary]:
+        plugins = self._get_plugins()
+        return [plugins[name].summary for name in sorted(plugins)]
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> Optional[click.Command]:
+        plugin = self._get_plugins().get(cmd_name)
+        if plugin is None:
+            return None
+        return LazyCommand(plugin.import_path).load()
+
+    def _manifest_key(self) -> List[Any]:
+        return [__version__, self.entry_point_group, _site_mtimes()]
+
+    def _get_plugins(self) -> Dict[str, _Plugin]:
+        if self._plugins is None:
+            key = self._manifest_key()
+            self._plugins = self._read_manifest(key)
+            if self._plugins is None:
+                self._plugins = self._build_manifest(key)
+        return self._plugins
+
+    def _read_manifest(self, key: List[Any]) -> Optional[Dict[str, _Plugin]]:
+        try:
+            manifest = json.loads(self.manifest_path.read_text("utf-8"))
+            if manifest["key"] != key:
+                return None
+            return {
+                name: _Plugin(import_path, CommandSummary(name, *summary))
+                for name, import_path, *summary in manifest["commands"]
+            }
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _build_manifest(self, key: List[Any]) -> Dict[str, _Plugin]:
+        plugins: Dict[str, _Plugin] = {}
+        complete = True
+        for entry_point in _entry_points(self.entry_point_group):
+            # the first distribution on sys.path wins, as for imports
+            if entry_point.name in plugins:
+                continue
+            import_path = entry_point.value.partition("[")[0].strip()
+            try:
+                cmd = LazyCommand(import_path).load()
+            except Exception:
+                # listed without help and left out of the manifest, so a broken
+                # plugin is retried next time rather than until the next install
+                summary = CommandSummary(entry_point.name)
+                complete = False
+            else:
+                summary = CommandSummary(
+                    entry_point.name,
+                    cmd.short_help,
+                    cmd.hidden,
+                    cmd.deprecated,
+                    None,
+                    cmd.help,
+                )
+            plugins[entry_point.name] = _Plugin(import_path, summary)
+
+        if complete:
+            commands = [
+                [name, import_path, *summary[1:]]
+                for name, (import_path, summary) in plugins.items()
+            ]
+            try:
+                atomic_write(
+                    self.manifest_path,
+                    json.dumps({"key": key, "commands": commands}).encode("utf-8"),
+                )
+            except OSError:
+                # a read-only cache only costs scanning the entry points again
+                pass
+        return plugins
@@ -0,0 +1,96 @@
+"""
+Profile rendering help, for the hidden ``--help-profile PATH`` option.
+
+Styled commands created with ``help_profile=True`` accept the option, which
+prints the help as ``--help`` would while recording a `cProfile` profile to
+``PATH`` and the largest allocations to ``PATH`` with an
+``.allocations.txt`` suffix.
+"""
+import cProfile
+import tracemalloc
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+import click
+
+HELP_PROFILE_OPTION = "--help-profile"
+
+ALLOCATIONS_LIMIT = 25
+
+
+def allocations_path(path: str) -> Path:
+    return Path(path).with_suffix(".allocations.txt")
+
+
+def _allocations_report(snapshot: tracemalloc.Snapshot, limit: int) -> str:
+    snapshot = snapshot.filter_traces(
+        [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, cProfile.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]
+    )
+    stats = snapshot.statistics("lineno")
+    total = sum(stat.size for stat in stats)
+    lines = [f"Top {limit} of {len(stats)} allocating lines, {total / 1024:.1f} KiB"]
+    lines.extend(str(stat) for stat in stats[:limit])
+    return "\n".join(lines) + "\n"
+
+
+def profile_help(
+    ctx: click.Context, path: str, limit: int = ALLOCATIONS_LIMIT
+) -> Tuple[str, Path]:
+    """
+    Render the help of `ctx` under `cProfile` and `tracemalloc`.
+
+    The help cache is skipped so the help is always rendered.
+
+    :return: the help and the path of the allocations report.
+    """
+    command: Any = ctx.command
+    help_cache = getattr(command, "help_cache", None)
+    command.help_cache = None
+    # don't stop tracing someone else started
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+        try:
+            help = ctx.get_help()
+        finally:
+            profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+        command.help_cache = help_cache
+
+    profiler.dump_stats(path)
+    report = allocations_path(path)
+    report.write_text(_allocations_report(snapshot, limit), "utf-8")
+    return help, report
+
+
+def _help_profile_callback(
+    ctx: click.Context, param: click.Parameter, value: Optional[str]
+) -> None:
+    if value is None or ctx.resilient_parsing:
+        return
+    help, report = profile_help(ctx, value)
+    click.echo(help, color=ctx.color)
+    click.echo(f"Wrote profile to {value} and allocations to {report}", err=True)
+    ctx.exit()
+
+
+def help_profile_option() -> click.Option:
+    return click.Option(
+        [HELP_PROFILE_OPTION],
+        type=click.Path(dir_okay=False, writable=True),
+        is_eager=True,
+        expose_value=False,
+        hidden=True,
+        callback=_help_profile_callback,
+        help="Profile rendering help, writing pstats to PATH.",
+    )
@@ -0,0 +1,173 @@
+"""
+Themes for `use_theme` loaded from files and entry points.
+
+Names missing from `click_rich_help.core.THEMES` are looked up as
+``<name>.toml`` or ``<name>.ini`` in the directories of `theme_dirs`, then as
+an entry point in the ``click_rich_help.themes`` group. `use_theme` also
+accepts the path of a theme file.
+
+Theme files hold a ``[styles]`` section, as read by `rich.theme.Theme.read`:
+
+    [styles]
+    header = "bold italic cyan"
+    option = "bold yellow"
+
+Every style of a theme file is validated once and the normalized styles are
+cached on disk until the file is modified, so later runs skip reading the file
+and reporting invalid styles. Rich still parses the cached styles again when
+they are made into a `rich.theme.Theme`.
+"""
+import configparser
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Union
+
+from . import __version__
+from .diskcache import atomic_write, cache_dir
+from .utils import _entry_points as _group_entry_points
+
+ENTRY_POINT_GROUP = "click_rich_help.themes"
+
+THEME_PATH_ENV_VAR = "CLICK_RICH_HELP_THEME_PATH"
+
+THEME_SUFFIXES = (".toml", ".ini")
+
+
+def theme_dirs() -> List[Path]:
+    """
+    Directories searched for theme files, in order.
+
+    Those listed in ``$CLICK_RICH_HELP_THEME_PATH`` and then
+    ``$XDG_CONFIG_HOME/click-rich-help/themes``.
+    """
+    dirs = [
+        Path(path)
+        for path in os.environ.get(THEME_PATH_ENV_VAR, "").split(os.pathsep)
+        if path
+    ]
+    config = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+    dirs.append(Path(config, "click-rich-help", "themes"))
+    return dirs
+
+
+def _read_styles(path: Path) -> Mapping[str, Any]:
+    if path.suffix == ".toml":
+        if sys.version_info >= (3, 11):
+            import tomllib
+        else:
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ValueError(
+                    f"Unable to read theme {path}, "
+                    "TOML themes need python 3.11 or tomli installed"
+                )
+        with path.open("rb") as f:
+            styles = tomllib.load(f).get("styles")
+        if not isinstance(styles, dict):
+            raise ValueError(f"Theme {path} has no [styles] table")
+        return styles
+
+    config = configparser.ConfigParser()
+    with path.open(encoding="utf-8") as f:
+        config.read_file(f)
+    if not config.has_section("styles"):
+        raise ValueError(f"Theme {path} has no [styles] section")
+    # quoted values are common as they are required by TOML
+    return {name: value.strip("\"'") for name, value in config.items("styles")}
+
+
+def _compile_styles(path: Path, styles: Mapping[str, Any]) -> Dict[str, str]:
+    from rich.errors import StyleSyntaxError
+    from rich.style import Style
+
+    compiled = {}
+    for name, definition in styles.items():
+        try:
+            compiled[name] = str(Style.parse(definition))
+        except (StyleSyntaxError, AttributeError) as e:
+            raise ValueError(f"Invalid style {name!r} in theme {path}: {e}")
+    return compiled
+
+
+def load_theme_file(path: Union[str, "os.PathLike[str]"]) -> Dict[str, str]:
+    """
+    Styles of a TOML or INI theme file, validated and normalized by rich.
+
+    The result is cached on disk, keyed by the modification time and size of
+    the file, so later calls skip reading the file and checking its styles.
+    """
+    path = Path(path).absolute()
+    stat = path.stat()
+    key = [__version__, str(path), stat.st_mtime_ns, stat.st_size]
+    name = hashlib.sha256(str(path).encode()).hexdigest()
+    cache_path = cache_dir("themes", f"{name}.json")
+
+    try:
+        cached = json.loads(cache_path.read_text("utf-8"))
+        if cached["key"] == key:
+            return dict(cached["styles"])
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    styles = _compile_styles(path, _read_styles(path))
+    try:
+        atomic_write(
+            cache_path, json.dumps({"key": key, "styles": styles}).encode("utf-8")
+        )
+    except OSError:
+        # a read-only cache only costs the validation next time
+        pass
+    return styles
+
+
+def _entry_points() -> List[Any]:
+    try:
+        return _group_entry_points(ENTRY_POINT_GROUP)
+    except ImportError:
+        # themes from entry points are only one of the places themes come from
+        return []
+
+
+def load_theme(name: str) -> Any:
+    """
+    Find the theme `name` in the theme directories or entry points.
+
+    Entry points may refer to a dict of styles, a `rich.theme.Theme` or the
+    path of a theme file.
+
+    :raises KeyError: if there is no such theme.
+    """
+    if name.endswith(THEME_SUFFIXES):
+        return load_theme_file(name)
+
+    for directory in theme_dirs():
+        for suffix in THEME_SUFFIXES:
+            path = directory / f"{name}{suffix}"
+            if path.is_file():
+                return load_theme_file(path)
+
+    for entry_point in _entry_points():
+        if entry_point.name == name:
+            theme = entry_point.load()
+            if isinstance(theme, (str, os.PathLike)):
+                return load_theme_file(theme)
+            return theme
+
+    raise KeyError(name)
+
+
+def available_themes() -> List[str]:
+    """Names of the themes in the theme directories and entry points."""
+    names = {
+        path.stem
+        for directory in theme_dirs()
+        if directory.is_dir()
+        for path in directory.iterdir()
+        if path.suffix in THEME_SUFFIXES
+    }
+    names.update(entry_point.name for entry_point in _entry_points())
+    return sorted(names)
@@ -0,0 +1,151 @@
+"""
+Opt-in timing of the phases of rendering help.
+
+Set ``CLICK_RICH_HELP_TRACE=1`` to print a report to stderr after every help
+page, or pass a callback to `set_trace_sink` to receive each `HelpTrace`:
+
+    Help trace for 'cli sub': 12.41ms
+      formatter         1 calls     3.02ms
+      ...
+      _colorize        38 calls  1204 bytes
+
+Phases may nest, e.g. ``get_command`` runs inside ``format_commands``, so
+their times are inclusive.
+
+Only the standard library may be imported here.
+"""
+import os
+import sys
+import threading
+import time
+from typing import Callable, ContextManager, Dict, NamedTuple, Optional
+
+TRACE_ENV_VAR = "CLICK_RICH_HELP_TRACE"
+
+PHASES = (
+    "formatter",
+    "get_styles",
+    "console",
+    "compile_styles",
+    "write_usage",
+    "format_options",
+    "format_commands",
+    "get_command",
+    "write_dl",
+)
+
+
+class PhaseStats(NamedTuple):
+    calls: int
+    seconds: float
+
+
+class HelpTrace:
+    """Wall time and call counts of each phase of rendering one help page."""
+
+    def __init__(self, command_path: str, parent: "HelpTrace" = None):
+        self.command_path = command_path
+        self.parent = parent
+        self.phases: Dict[str, PhaseStats] = {
+            name: PhaseStats(0, 0.0) for name in PHASES
+        }
+        self.colorize_calls = 0
+        self.colorize_bytes = 0
+        self.seconds = 0.0
+        self._start = time.perf_counter()
+
+    def add(self, phase: str, seconds: float) -> None:
+        calls, total = self.phases.get(phase, PhaseStats(0, 0.0))
+        self.phases[phase] = PhaseStats(calls + 1, total + seconds)
+
+    def report(self) -> str:
+        lines = [f"Help trace for {self.command_path!r}: {self.seconds * 1000:.2f}ms"]
+        for name, (calls, seconds) in self.phases.items():
+            lines.append(f"  {name:<16}{calls:>4} calls {seconds * 1000:>9.2f}ms")
+        lines.append(
+            f"  {'_colorize':<16}{self.colorize_calls:>4} calls "
+            f"{self.colorize_bytes:>7} bytes"
+        )
+        return "\n".join(lines)
+
+
+TraceSink = Callable[[HelpTrace], None]
+
+_sink: Optional[TraceSink] = None
+_local = threading.local()
+_lock = threading.Lock()
+# number of traces in progress in any thread, checked before touching _local
+_active = 0
+
+
+def set_trace_sink(sink: Optional[TraceSink]) -> None:
+    """
+    Call `sink` with a `HelpTrace` after every help page is rendered.
+
+    Pass ``None`` to stop tracing, unless ``CLICK_RICH_HELP_TRACE`` is set.
+    """
+    global _sink
+    _sink = sink
+
+
+def _write_report(trace: HelpTrace) -> None:
+    print(trace.report(), file=sys.stderr)
+
+
+def start(command_path: str) -> Optional[HelpTrace]:
+    """Begin tracing a help page if tracing is enabled."""
+    global _active
+    if _sink is None and not os.environ.get(TRACE_ENV_VAR):
+        return None
+    trace = HelpTrace(command_path, getattr(_local, "trace", None))
+    _local.trace = trace
+    with _lock:
+        _active += 1
+    return trace
+
+
+def finish(trace: HelpTrace) -> None:
+    global _active
+    trace.seconds = time.perf_counter() - trace._start
+    _local.trace = trace.parent
+    with _lock:
+        _active -= 1
+    (_sink or _write_report)(trace)
+
+
+class _Phase:
+    __slots__ = ("trace", "name", "start")
+
+    def __init__(self, trace: HelpTrace, name: str):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.trace.add(self.name, time.perf_counter() - self.start)
+
+
+class _NoPhase:
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc_info: object) -> None:
+        pass
+
+
+_NO_PHASE = _NoPhase()
+
+
+def phase(name: str) -> ContextManager[None]:
+    """Time the block as `name` in the current trace, if there is one."""
+    trace = getattr(_local, "trace", None) if _active else None
+    return _NO_PHASE if trace is None else _Phase(trace, name)
+
+
+def count_colorize(text: str) -> None:
+    trace = getattr(_local, "trace", None)
+    if trace is not None:
+        trace.colorize_calls += 1
+        trace.colorize_bytes += len(text.encode("utf-8"))
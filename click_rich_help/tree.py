@@ -0,0 +1,236 @@
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import (
+    Collection,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import click
+
+from .core import (
+    HELP_ROWS_META_KEY,
+    HelpRecord,
+    HelpStylesFormatter,
+    LazyCommand,
+    StyledCommand,
+    StyledGroup,
+    StyledMultiCommand,
+    _is_plain,
+    _max_width,
+    _new_formatter,
+    _style_fingerprint,
+)
+
+STYLED_COMMANDS = (StyledCommand, StyledGroup, StyledMultiCommand)
+
+EXECUTORS = ("process", "thread")
+
+Pages = Dict[str, Dict[int, str]]
+
+
+def _root_context(
+    cli: click.Command, color: bool, prog_name: Optional[str]
+) -> click.Context:
+    ctx = cli.context_class(
+        cli,
+        info_name=prog_name or cli.name,
+        color=color,
+        resilient_parsing=True,
+        **cli.context_settings,
+    )
+    # shared by every context in the chain
+    ctx.meta[HELP_ROWS_META_KEY] = {}
+    return ctx
+
+
+def _sub_context(
+    ctx: click.Context, name: str, include_hidden: bool = True
+) -> Optional[click.Context]:
+    command = ctx.command
+    if not isinstance(command, click.MultiCommand):
+        return None
+    sub = command.get_command(ctx, name)
+    if sub is None or (sub.hidden and not include_hidden):
+        return None
+    if isinstance(command, StyledMultiCommand):
+        sub = command._styled_command(sub)
+    # the context make_context would create, without parsing any args
+    return sub.context_class(sub, info_name=name, parent=ctx, **sub.context_settings)
+
+
+def _walk(ctx: click.Context, include_hidden: bool) -> Iterator[click.Context]:
+    yield ctx
+    if isinstance(ctx.command, click.MultiCommand):
+        for name in ctx.command.list_commands(ctx):
+            sub_ctx = _sub_context(ctx, name, include_hidden)
+            if sub_ctx is not None:
+                yield from _walk(sub_ctx, include_hidden)
+
+
+def _find(
+    root: click.Context, paths: Iterable[Tuple[str, ...]]
+) -> Iterator[click.Context]:
+    """Contexts of the given subcommand names below `root`, reusing parents."""
+    contexts: Dict[Tuple[str, ...], Optional[click.Context]] = {(): root}
+    for path in paths:
+        for depth in range(1, len(path) + 1):
+            if path[:depth] not in contexts:
+                parent = contexts[path[: depth - 1]]
+                contexts[path[:depth]] = (
+                    None if parent is None else _sub_context(parent, path[depth - 1])
+                )
+        ctx = contexts[path]
+        if ctx is None:
+            raise click.UsageError(f"No such command {' '.join(path)!r}.")
+        yield ctx
+
+
+def _names(ctx: click.Context) -> Tuple[str, ...]:
+    names = []
+    while ctx.parent is not None:
+        names.append(ctx.info_name or "")
+        ctx = ctx.parent
+    return tuple(reversed(names))
+
+
+def _render(
+    root: click.Context, contexts: Iterable[click.Context], widths: Sequence[int]
+) -> Pages:
+    plain = _is_plain(root)
+    formatters: Dict[Tuple[object, ...], HelpStylesFormatter] = {}
+    # styled records don't depend on the width
+    row_caches: Dict[Tuple[object, ...], Dict[HelpRecord, Tuple[str, str]]] = {}
+    pages: Pages = {}
+
+    for ctx in contexts:
+        command = ctx.command
+        page = pages[ctx.command_path] = {}
+        max_width = _max_width(ctx)
+        with ctx.scope(cleanup=False):
+            for width in widths:
+                if not isinstance(command, STYLED_COMMANDS):
+                    ctx.terminal_width = width
+                    page[width] = command.get_help(ctx)
+                    continue
+
+                style_key = (
+                    command.use_theme,
+                    *_style_fingerprint(
+                        command.styles,
+                        command.theme,
+                        None,
+                        command.option_custom_styles,
+                    ),
+                )
+                key = (width, max_width, *style_key)
+                formatter = formatters.get(key)
+                if formatter is None:
+                    formatter = formatters[key] = _new_formatter(
+                        command, width, max_width, plain
+                    )
+                    formatter.row_cache = row_caches.setdefault(style_key, {})
+                command.format_help(ctx, formatter)
+                page[width] = formatter.getvalue().rstrip("\n")
+                formatter.buffer.clear()
+                formatter._reset_layout()
+    return pages
+
+
+def _render_shard(
+    cli: Union[click.Command, str],
+    paths: List[Tuple[str, ...]],
+    widths: Sequence[int],
+    color: bool,
+    prog_name: Optional[str],
+) -> Pages:
+    """Render some of the pages of `cli`, run by the workers of `render_tree`."""
+    if isinstance(cli, str):
+        cli = LazyCommand(cli).load()
+    # formatters and rich consoles are rebuilt in every worker from the styles
+    root = _root_context(cli, color, prog_name)
+    return _render(root, _find(root, paths), widths)
+
+
+def _import_path(cli: Union[click.Command, str]) -> str:
+    if isinstance(cli, str):
+        return cli
+    module_name = getattr(cli.callback, "__module__", None)
+    module = sys.modules.get(module_name or "")
+    for name, value in vars(module).items() if module else ():
+        if value is cli:
+            return f"{module_name}:{name}"
+    raise ValueError(
+        f"Unable to find {cli!r} in the module of its callback, "
+        "pass its import path as 'module:attribute' to render it in processes"
+    )
+
+
+def render_tree(
+    cli: Union[click.Command, str],
+    widths: Sequence[int] = (80,),
+    color: bool = True,
+    prog_name: str = None,
+    include_hidden: bool = False,
+    jobs: int = 1,
+    executor: str = "process",
+    only: Collection[str] = None,
+) -> Pages:
+    """
+    Render the help of `cli` and every subcommand below it.
+
+    Formatters are reused between commands with the same styles, and the help
+    rows of options are built once for all `widths`. The help of each page is
+    the same as `get_help` would return for a context with that
+    `terminal_width` and `color`.
+
+    :param cli: the root command, usually a `StyledGroup`, or its import path
+        as ``module:attribute``.
+    :param widths: terminal widths to render every page at.
+    :param color: render styled help, otherwise plain text.
+    :param prog_name: name of the root command, defaults to `cli.name`.
+    :param include_hidden: also render hidden subcommands.
+    :param jobs: number of workers to split the pages between.
+    :param executor: run workers in a ``"process"`` or ``"thread"`` pool,
+        processes import `cli` by its import path.
+    :param only: command paths to render, defaults to all of them.
+    :return: help keyed by command path and then width, in depth first order.
+    """
+    if executor not in EXECUTORS:
+        raise ValueError(f"executor must be one of {EXECUTORS}, got {executor!r}")
+
+    command = LazyCommand(cli).load() if isinstance(cli, str) else cli
+    root = _root_context(command, color, prog_name)
+    contexts: Iterable[click.Context] = _walk(root, include_hidden)
+    if only is not None:
+        contexts = (ctx for ctx in contexts if ctx.command_path in only)
+    if jobs <= 1:
+        return _render(root, contexts, widths)
+
+    contexts = list(contexts)
+    paths = [_names(ctx) for ctx in contexts]
+
+    pool: Executor
+    if executor == "process":
+        target: Union[click.Command, str] = _import_path(cli)
+        pool = ProcessPoolExecutor(max_workers=jobs)
+    else:
+        target = command
+        pool = ThreadPoolExecutor(max_workers=jobs)
+
+    pages: Pages = {}
+    with pool:
+        # one shard per worker so each builds its formatters only once
+        shards = [
+            pool.submit(_render_shard, target, paths[i::jobs], widths, color, prog_name)
+            for i in range(min(jobs, len(paths)))
+        ]
+        for shard in shards:
+            pages.update(shard.result())
+    return {ctx.command_path: pages[ctx.command_path] for ctx in contexts}
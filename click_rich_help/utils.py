@@ -1,7 +1,85 @@
-from typing import Union
+from __future__ import annotations
 
-from rich.console import CaptureError, Console
-from rich.style import Style
+import re
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import groupby
+from operator import itemgetter
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    List,
+    Match,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from click.formatting import wrap_text
+
+if TYPE_CHECKING:
+    from rich.console import Console
+    from rich.style import Style
+
+# anything rich would treat specially: markup tags, emoji codes, non-ascii (cell
+# widths) and control characters which rich strips or expands
+_NEEDS_RENDER_RE = re.compile(r"\[[a-z#/@][^[]*?]|:\S*?:|[^\x20-\x7e\n]")
+
+# emoji codes as rich finds them, with an optional variant
+_EMOJI_CODE_RE = re.compile(r":\S*?(?:-(?:emoji|text))?:")
+
+# same patterns rich.markup uses to find (escaped) tags
+_MARKUP_TAG_RE = re.compile(r"(\\*)\[([a-z#/@][^[]*?)]")
+
+# text whose cell width may differ from its length, or which rich would alter
+_NOT_PRINTABLE_ASCII_RE = re.compile(r"[^\x20-\x7e\n]")
+
+# SGR codes as rich emits them, any other escape is left to click
+_SGR_RE = re.compile(r"\x1b\[[0-9;]*m")
+_SGR_RESET = "\x1b[0m"
+
+# words and blanks of a wrapped line, and what click drops between words
+_WORD_RE = re.compile(r"\s+|\S+")
+_BLANKS_RE = re.compile(r"\s*")
+_SKIPPED_RE = re.compile(r"[\s\x08]*")
+
+MARKUP_CACHE_SIZE = 1024
+
+# runs of text and the markup tags styling them, see _parse_markup
+MarkupRuns = Tuple[Tuple[str, Tuple[str, ...]], ...]
+
+
+class SGRStyle(NamedTuple):
+    """Prebuilt ANSI escape codes wrapping text in a given style."""
+
+    prefix: str
+    suffix: str
+
+
+def _entry_points(group: str) -> List[Any]:
+    """
+    Entry points of `group` in the installed distributions.
+
+    :raises ImportError: on python 3.7 without ``importlib_metadata``.
+    """
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:  # python 3.7
+        try:
+            from importlib_metadata import entry_points  # type: ignore
+        except ImportError:
+            raise ImportError(
+                f"Finding {group} entry points needs python 3.8 or "
+                "importlib_metadata installed"
+            )
+    eps = entry_points()
+    if hasattr(eps, "select"):
+        return list(eps.select(group=group))
+    return list(eps.get(group, ()))  # type: ignore[attr-defined]
 
 
 def _colorize(
@@ -10,9 +88,420 @@ def _colorize(
     style: Union[str, Style] = None,
     suffix: str = None,
 ) -> str:
+    from rich.console import CaptureError
+
     try:
         with console.capture() as capture:
             console.print(text, style=style, end="")
         return capture.get() + (suffix or "")
     except CaptureError:
         raise ValueError(f"Error capturing output for text: {text} and style: {style}")
+
+
+def _colorize_many(
+    console: Console, fragments: Sequence[Tuple[str, Union[str, Style]]]
+) -> List[str]:
+    """Render several fragments in one pass, as `_colorize` would individually."""
+    from rich.console import CaptureError
+
+    # rich lays out every line on its own, so fragments joined by a line holding
+    # only the separator render exactly as if they were printed one at a time
+    separator = "\n\0\n"
+    texts = [console.render_str(text, style=style) for text, style in fragments]
+    try:
+        with console.capture() as capture:
+            console.print(*texts, sep=separator, end="")
+        return capture.get().split(separator)
+    except CaptureError:
+        raise ValueError(f"Error capturing output for fragments: {fragments}")
+
+
+def _compile_style(console: Console, style: Union[str, Style]) -> SGRStyle:
+    """Precompute the codes `console` would emit around text printed in `style`."""
+    from rich.console import COLOR_SYSTEMS
+
+    rich_style = console.get_style(style) if isinstance(style, str) else style
+    if console.no_color:
+        rich_style = rich_style.without_color
+
+    color_system = COLOR_SYSTEMS[console.color_system] if console.color_system else None
+    prefix, _, suffix = rich_style.render(
+        "\0", color_system=color_system, legacy_windows=console.legacy_windows
+    ).partition("\0")
+    return SGRStyle(prefix, suffix)
+
+
+# attributes in the order rich emits them, with their aliases and codes
+_SGR_ATTRIBUTES = (
+    (("bold", "b"), "1"),
+    (("dim", "d"), "2"),
+    (("italic", "i"), "3"),
+    (("underline", "u"), "4"),
+    (("blink",), "5"),
+    (("blink2",), "6"),
+    (("reverse", "r"), "7"),
+    (("conceal", "c"), "8"),
+    (("strike", "s"), "9"),
+    (("underline2", "uu"), "21"),
+    (("frame",), "51"),
+    (("encircle",), "52"),
+    (("overline", "o"), "53"),
+)
+_SGR_ATTRIBUTE_NAMES = {
+    name: position
+    for position, (names, _) in enumerate(_SGR_ATTRIBUTES)
+    for name in names
+}
+
+# the 16 colors which are the same in every color system rich supports
+_STANDARD_COLORS = (
+    "black",
+    "red",
+    "green",
+    "yellow",
+    "blue",
+    "magenta",
+    "cyan",
+    "white",
+)
+_STANDARD_COLOR_NUMBERS = {
+    **{name: number for number, name in enumerate(_STANDARD_COLORS)},
+    **{f"bright_{name}": number + 8 for number, name in enumerate(_STANDARD_COLORS)},
+    **{f"color({number})": number for number in range(16)},
+}
+
+
+def _standard_color_code(word: str, foreground: bool) -> Optional[str]:
+    if word == "default":
+        return "39" if foreground else "49"
+    number = _STANDARD_COLOR_NUMBERS.get(word)
+    if number is None:
+        return None
+    if number < 8:
+        return str((30 if foreground else 40) + number)
+    return str((90 if foreground else 100) + number - 8)
+
+
+def _parse_style(definition: str) -> Optional[SGRStyle]:
+    """
+    Compile a style definition without rich, as `_compile_style` would for a
+    terminal. Returns ``None`` for styles which need rich, such as 256 or
+    truecolor colors that depend on the color system, or links.
+    """
+    if definition.strip() == "none":
+        return SGRStyle("", "")
+
+    attributes: Dict[int, bool] = {}
+    color = bgcolor = None
+    words = iter(definition.lower().split())
+    for word in words:
+        if word == "on":
+            bgcolor = _standard_color_code(next(words, ""), foreground=False)
+            if bgcolor is None:
+                return None
+        elif word == "not":
+            position = _SGR_ATTRIBUTE_NAMES.get(next(words, ""))
+            if position is None:
+                return None
+            attributes[position] = False
+        elif word in _SGR_ATTRIBUTE_NAMES:
+            attributes[_SGR_ATTRIBUTE_NAMES[word]] = True
+        else:
+            color = _standard_color_code(word, foreground=True)
+            if color is None:
+                return None
+
+    codes = [
+        code
+        for position, (_, code) in enumerate(_SGR_ATTRIBUTES)
+        if attributes.get(position)
+    ]
+    codes.extend(code for code in (color, bgcolor) if code is not None)
+    if not codes:
+        return SGRStyle("", "")
+    return SGRStyle(f"\x1b[{';'.join(codes)}m", "\x1b[0m")
+
+
+@lru_cache(maxsize=MARKUP_CACHE_SIZE)
+def _parse_markup(markup: str) -> Optional[MarkupRuns]:
+    """
+    Split rich markup into runs of text and the tags applied to each of them,
+    in the order rich combines them. Returns ``None`` for markup rich has to
+    render itself, such as invalid markup, emoji, links or meta tags.
+
+    Cached so markup shown again is only parsed once.
+    """
+    from rich.errors import MarkupError
+    from rich.markup import render
+
+    # links get a new id every time rich renders them
+    if any("=" in match.group(2) for match in _MARKUP_TAG_RE.finditer(markup)):
+        return None
+    try:
+        text = render(markup)
+    except MarkupError:
+        return None
+    plain = text.plain
+    spans = text.spans
+    if _NOT_PRINTABLE_ASCII_RE.search(plain) or any(
+        not isinstance(span.style, str) for span in spans
+    ):
+        return None
+
+    # the same walk over span boundaries as rich.text.Text.render
+    boundaries = [
+        (0, False, 0),
+        *((span.start, False, index) for index, span in enumerate(spans, 1)),
+        *((span.end, True, index) for index, span in enumerate(spans, 1)),
+        (len(plain), True, 0),
+    ]
+    boundaries.sort(key=itemgetter(0, 1))
+    stack: List[int] = []
+    runs = []
+    for (offset, leaving, index), (next_offset, _, _) in zip(
+        boundaries, boundaries[1:]
+    ):
+        if leaving:
+            stack.remove(index)
+        else:
+            stack.append(index)
+        if next_offset > offset:
+            tags = tuple(str(spans[i - 1].style) for i in sorted(stack) if i)
+            runs.append((plain[offset:next_offset], tags))
+    return tuple(runs)
+
+
+def _needs_render(text: str) -> bool:
+    """Check if `text` must go through rich rather than the precompiled codes."""
+    return _NEEDS_RENDER_RE.search(text) is not None
+
+
+def _escape_markup(text: str) -> str:
+    """Escape text so rich shows it literally, as `rich.markup.escape` does."""
+
+    def escape(match: Match[str]) -> str:
+        backslashes, tag = match.groups()
+        return f"{backslashes}{backslashes}\\[{tag}]"
+
+    text = _MARKUP_TAG_RE.sub(escape, text)
+    if text.endswith("\\") and not text.endswith("\\\\"):
+        return text + "\\"
+    return text
+
+
+def _strip_markup(text: str) -> str:
+    """Remove rich markup tags from `text`, as `rich.markup.render` would."""
+    if "[" not in text:
+        return text
+
+    segments = []
+    position = 0
+    for match in _MARKUP_TAG_RE.finditer(text):
+        start, end = match.span()
+        segments.append(text[position:start])
+        backslashes, escaped = divmod(len(match.group(1)), 2)
+        segments.append("\\" * backslashes)
+        if escaped:
+            segments.append(f"[{match.group(2)}]")
+        position = end
+    segments.append(text[position:])
+    # rich also unescapes brackets which aren't part of a tag
+    return "".join(segment.replace("\\[", "[") for segment in segments)
+
+
+def _replace_emoji(text: str) -> str:
+    """
+    Replace emoji codes such as ``:+1:`` as rich does, only importing its table
+    of emoji for text which may contain them.
+    """
+    if ":" not in text or _EMOJI_CODE_RE.search(text) is None:
+        return text
+    from rich.emoji import Emoji
+
+    return Emoji.replace(text)
+
+
+def _emit(sgr: SGRStyle, text: str, suffix: str = None) -> str:
+    """Wrap `text` with precompiled codes, matching rich's line-by-line output."""
+    if sgr.prefix:
+        if "\n" in text:
+            text = "\n".join(
+                sgr.prefix + line + sgr.suffix if line else line
+                for line in text.split("\n")
+            )
+        elif text:
+            text = sgr.prefix + text + sgr.suffix
+    return text + (suffix or "")
+
+
+class StyledText(NamedTuple):
+    """
+    Plain text and the runs styling it: run ``i`` ends at ``ends[i]`` and is
+    styled by the codes with id ``styles[i]`` in a table of SGR prefixes.
+    """
+
+    plain: str
+    ends: array[int]
+    styles: array[int]
+
+
+def _split_sgr(text: str, style_ids: Dict[str, int]) -> Optional[StyledText]:
+    """
+    Split the SGR codes from `text`, numbering the codes of each run in
+    `style_ids`. Returns ``None`` if it holds escapes other than SGR codes.
+    """
+    plain: List[str] = []
+    ends = array("I")
+    styles = array("H")
+    active = ""
+    offset = position = 0
+    for match in _SGR_RE.finditer(text + _SGR_RESET):
+        chunk = text[position : match.start()]
+        if chunk:
+            plain.append(chunk)
+            offset += len(chunk)
+            ends.append(offset)
+            styles.append(style_ids.setdefault(active, len(style_ids)))
+        code = match.group()
+        active = "" if code == _SGR_RESET else active + code
+        position = match.end()
+
+    plain_text = "".join(plain)
+    if "\x1b" in plain_text:
+        return None
+    return StyledText(plain_text, ends, styles)
+
+
+def _join_runs(text: StyledText, prefixes: Sequence[str]) -> str:
+    """Styled text of `text` as rich renders it, the reverse of `_split_sgr`."""
+    parts = []
+    start = 0
+    for end, style in zip(text.ends, text.styles):
+        chunk = text.plain[start:end]
+        prefix = prefixes[style]
+        parts.append(f"{prefix}{chunk}{_SGR_RESET}" if prefix else chunk)
+        start = end
+    return "".join(parts)
+
+
+def _restyle_line(segments: List[List[Optional[str]]], base_style: str) -> str:
+    """
+    Join the `[prefix, text, fallback]` segments of a wrapped line, see
+    `_wrap_runs`. Blanks have no prefix yet and take the style around them,
+    so reflowed text keeps a single run.
+    """
+    last = len(segments) - 1
+    for index, segment in enumerate(segments):
+        if segment[0] is not None:
+            continue
+        before = segments[index - 1][0] if index else None
+        after = segments[index + 1][0] if index < last else None
+        if not index:
+            segment[0] = base_style
+        elif before == after:
+            segment[0] = before
+        else:
+            segment[0] = segment[2]
+
+    parts = []
+    for prefix, group in groupby(segments, key=itemgetter(0)):
+        chunk = "".join(text for _, text, _ in group)  # type: ignore[misc]
+        parts.append(f"{prefix}{chunk}{_SGR_RESET}" if prefix else chunk)
+    return "".join(parts)
+
+
+def _wrap_runs(
+    text: StyledText,
+    prefixes: Sequence[str],
+    width: int = 78,
+    initial_indent: str = "",
+    subsequent_indent: str = "",
+    preserve_paragraphs: bool = False,
+    base_style: str = "",
+) -> Optional[str]:
+    """
+    Lay out the plain text of `text` with `click.formatting.wrap_text` and put
+    its codes back, closing and reopening them on every line. Blanks which
+    indent a line or join two lines are styled with `base_style`.
+
+    Returns ``None`` if click's layout can't be matched up with the text.
+    """
+    plain = text.plain
+    if not initial_indent and "\n" not in plain and len(plain) <= width:
+        # a line which fits is kept as click lays out the styled text, which only
+        # drops blanks after the last code
+        return _join_runs(text, prefixes).rstrip()
+    wrapped = wrap_text(
+        plain, width, initial_indent, subsequent_indent, preserve_paragraphs
+    )
+    if wrapped == plain:
+        return _join_runs(text, prefixes)
+
+    # walk the words of the layout and the plain text together, click only
+    # adds, drops or replaces blanks and removes the \b of unwrapped paragraphs
+    ends = text.ends
+    styles = text.styles
+    position = 0
+    lines = []
+    for line in wrapped.split("\n"):
+        segments: List[List[Optional[str]]] = []
+        for word in _WORD_RE.findall(line):
+            if word.isspace():
+                source = plain[position : position + 1]
+                if source == "\n":
+                    fallback = base_style
+                elif source.isspace():
+                    fallback = prefixes[styles[bisect_right(ends, position)]]
+                else:
+                    fallback = ""
+                segments.append([None, word, fallback])
+                continue
+
+            position = _BLANKS_RE.match(plain, position).end()  # type: ignore[union-attr]
+            if not plain.startswith(word, position):
+                # the \b starting an unwrapped paragraph is dropped
+                position = _SKIPPED_RE.match(plain, position).end()  # type: ignore
+                if not plain.startswith(word, position):
+                    return None
+            stop = position + len(word)
+            run = bisect_right(ends, position)
+            while position < stop:
+                run_end = min(ends[run], stop)
+                segments.append([prefixes[styles[run]], plain[position:run_end], None])
+                position = run_end
+                run += 1
+        lines.append(_restyle_line(segments, base_style))
+    return "\n".join(lines)
+
+
+def _wrap_styled(
+    text: str,
+    width: int = 78,
+    initial_indent: str = "",
+    subsequent_indent: str = "",
+    preserve_paragraphs: bool = False,
+    base_style: str = "",
+) -> str:
+    """
+    `click.formatting.wrap_text` for text styled with SGR codes, so lines are
+    as wide as the plain text would be, see `_wrap_runs`.
+    """
+    style_ids = {"": 0}
+    split = _split_sgr(text, style_ids) if "\x1b" in text else None
+    wrapped = None
+    if split is not None:
+        wrapped = _wrap_runs(
+            split,
+            list(style_ids),
+            width,
+            initial_indent,
+            subsequent_indent,
+            preserve_paragraphs,
+            base_style,
+        )
+    if wrapped is None:
+        # other escapes or an unexpected layout are left to click
+        return wrap_text(
+            text, width, initial_indent, subsequent_indent, preserve_paragraphs
+        )
+    return wrapped
@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+
+# Benchmark help rendering for synthetic CLIs of increasing size.
+# Results are written as JSON so runs can be diffed between versions:
+#   python scripts/benchmark.py --output before.json
+#   python scripts/benchmark.py --output after.json --sizes 10,100
+
+
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from importlib.metadata import version
+from typing import Callable, Dict, List
+
+import click
+
+import click_rich_help
+from click_rich_help import StyledCommand, StyledGroup, StyledMultiCommand
+
+WIDTH = 100
+
+STYLES = {"header": "bold italic cyan", "option": "bold yellow", "metavar": "green"}
+
+
+def make_options(size: int) -> List[click.Option]:
+    options = []
+    for i in range(size):
+        if i % 3 == 0:
+            option = click.Option(
+                [f"--opt-{i}"], help=f"option number {i}", default=i, show_default=True
+            )
+        elif i % 3 == 1:
+            option = click.Option(
+                [f"-o{i}", f"--choice-{i}"],
+                help=f"[b]choose[/] for option {i}",
+                type=click.Choice(["one", "two", "three"]),
+            )
+        else:
+            option = click.Option(
+                [f"--flag-{i}/--no-flag-{i}"], help=f"toggle {i}", required=True
+            )
+        options.append(option)
+    return options
+
+
+def make_commands(cls: type, size: int, **kwargs: object) -> Dict[str, click.Command]:
+    return {
+        f"cmd-{i}": cls(
+            name=f"cmd-{i}",
+            help=f"Command number {i}.\n\nWith a longer description.",
+            params=[click.Option(["--name"], help="a name")],
+            **kwargs,
+        )
+        for i in range(size)
+    }
+
+
+def styled_group(size: int) -> click.Command:
+    return StyledGroup(
+        name="cli", styles=STYLES, commands=make_commands(StyledCommand, size)
+    )
+
+
+def click_group(size: int) -> click.Command:
+    return click.Group(name="cli", commands=make_commands(click.Command, size))
+
+
+def styled_command(size: int) -> click.Command:
+    return StyledCommand(name="cli", styles=STYLES, params=make_options(size))
+
+
+def click_command(size: int) -> click.Command:
+    return click.Command(name="cli", params=make_options(size))
+
+
+def styled_multi_command(size: int) -> click.Command:
+    commands = make_commands(click.Command, size)
+
+    class MultiCommand(StyledMultiCommand):
+        def list_commands(self, ctx: click.Context) -> List[str]:
+            return list(commands)
+
+        def get_command(self, ctx: click.Context, name: str) -> click.Command:
+            return commands[name]
+
+    return MultiCommand(name="cli", styles=STYLES)
+
+
+CASES: Dict[str, Callable[[int], click.Command]] = {
+    "StyledGroup": styled_group,
+    "click.Group": click_group,
+    "StyledCommand": styled_command,
+    "click.Command": click_command,
+    "StyledMultiCommand": styled_multi_command,
+}
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def run_case(
+    factory: Callable[[int], click.Command], size: int, repeat: int, color: bool
+) -> Dict:
+    cmd = factory(size)
+    ctx = click.Context(cmd, info_name="cli", terminal_width=WIDTH, color=color)
+
+    start = time.perf_counter()
+    help = cmd.get_help(ctx)
+    first = time.perf_counter() - start
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cmd.get_help(ctx)
+        samples.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    cmd.get_help(ctx)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "size": size,
+        "repeat": repeat,
+        "first_ms": first * 1000,
+        "mean_ms": statistics.mean(samples) * 1000,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p90_ms": percentile(samples, 90) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "peak_kib": peak / 1024,
+        "output_chars": len(help),
+    }
+
+
+@click.command(cls=StyledCommand, context_settings={"max_content_width": 90})
+@click.option(
+    "--sizes",
+    default="10,100,1000,10000",
+    show_default=True,
+    help="comma separated number of commands/options",
+)
+@click.option("--repeat", default=20, show_default=True, help="timed renders per case")
+@click.option(
+    "--case",
+    "cases",
+    multiple=True,
+    type=click.Choice(list(CASES)),
+    help="cases to run, defaults to all",
+)
+@click.option(
+    "--color/--no-color",
+    default=True,
+    show_default=True,
+    help="render styled help, or the plain help shown when piped",
+)
+@click.option("--output", type=click.File("w"), default="-", help="json output file")
+def main(sizes: str, repeat: int, cases: List[str], color: bool, output) -> None:
+    """Time help rendering and report latency percentiles and peak memory."""
+    results = []
+    for name in cases or CASES:
+        for size in (int(size) for size in sizes.split(",")):
+            # keep the largest cases from dominating the run time
+            case_repeat = max(3, min(repeat, repeat * 100 // size))
+            result = {"case": name, **run_case(CASES[name], size, case_repeat, color)}
+            click.echo(
+                f"{name:>20} {size:>6}: "
+                f"p50 {result['p50_ms']:9.2f}ms  p99 {result['p99_ms']:9.2f}ms  "
+                f"peak {result['peak_kib']:9.1f}KiB",
+                err=True,
+            )
+            results.append(result)
+
+    json.dump(
+        {
+            "versions": {
+                "click_rich_help": click_rich_help.__version__,
+                "click": version("click"),
+                "rich": version("rich"),
+                "python": platform.python_version(),
+            },
+            "platform": platform.platform(),
+            "width": WIDTH,
+            "color": color,
+            "results": results,
+        },
+        output,
+        indent=2,
+    )
+    output.write("\n")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
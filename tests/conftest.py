@@ -1,7 +1,55 @@
+import importlib
+import sys
+
+import click
 import pytest
 from click.testing import CliRunner
 
+from click_rich_help import StyledGroup
+
 
 @pytest.fixture
 def runner():
     return CliRunner()
+
+
+@pytest.fixture
+def write_module(tmp_path, monkeypatch):
+    """Write modules to a directory on `sys.path`, returning their paths."""
+    directory = tmp_path / "modules"
+    directory.mkdir()
+    monkeypatch.syspath_prepend(str(directory))
+
+    def write(name, source):
+        path = directory / f"{name}.py"
+        path.write_text(source)
+        monkeypatch.delitem(sys.modules, name, raising=False)
+        importlib.invalidate_caches()
+        return path
+
+    return write
+
+
+@pytest.fixture
+def nested_cli():
+    @click.group(cls=StyledGroup, styles={"header": "red", "option": "green"})
+    @click.option("--verbose", is_flag=True, help="[b]more[/] output")
+    def cli(verbose):
+        pass
+
+    @cli.group(styles={"header": "blue"})
+    @click.option("--name", default="me", show_default=True, help="who to greet")
+    def sub(name):
+        pass
+
+    @sub.command()
+    @click.option("--count", type=click.IntRange(1, 5), help="how many")
+    def leaf(count):
+        """A leaf command with a long enough docstring to wrap at narrow widths."""
+
+    @cli.command(hidden=True)
+    def secret():
+        pass
+
+    cli.add_command(click.Command("plain", help="Not styled."))
+    return cli
@@ -1,7 +1,8 @@
 import click
+import pytest
 from rich.errors import StyleSyntaxError
 
-from click_rich_help import StyledCommand, StyledGroup
+from click_rich_help import StyledCommand, StyledGroup, example
 
 
 def test_basic_group(runner):
@@ -80,7 +81,7 @@ def test_env_no_color(runner):
     result = runner.invoke(cli, ["--help"], color=True, env={"NO_COLOR": "1"})
     assert not result.exception
     assert result.output.splitlines() == [
-        "Usage: \x1b[1mcli\x1b[0m \x1b[1m[OPTIONS] COMMAND [ARGS]...\x1b[0m",
+        "Usage: cli [OPTIONS] COMMAND [ARGS]...",
         "",
         "Options:",
         "  --name TEXT  The person to greet.",
@@ -229,3 +230,39 @@ def test_show_default_styled(runner):
         "  \x1b[32m--count \x1b[0m\x1b[31mINTEGER\x1b[0m     number of times to print \x1b[2m[default: 5]\x1b[0m",
         "  \x1b[32m--help\x1b[0m              Show this message and exit.",
     ]
+
+
+@pytest.mark.parametrize("args", [[], *[[name] for name in example.cli.commands]])
+def test_plain_help_matches_unstyled_help(runner, args):
+    styled = runner.invoke(example.cli, [*args, "--help"], color=True)
+    plain = runner.invoke(example.cli, [*args, "--help"])
+    assert not styled.exception and not plain.exception
+    assert [line.rstrip() for line in click.unstyle(styled.output).splitlines()] == [
+        line.rstrip() for line in plain.output.splitlines()
+    ]
+
+
+@pytest.mark.parametrize("color", [True, False])
+def test_invalid_styles_rejected_with_and_without_color(runner, color):
+    def make_cli(**style_kwargs):
+        @click.command(cls=StyledCommand, **style_kwargs)
+        def cli():
+            pass
+
+        return cli
+
+    result = runner.invoke(make_cli(use_theme="nope"), ["--help"], color=color)
+    assert result.exit_code == 2
+    assert "nope isn't one of" in result.output
+
+    result = runner.invoke(
+        make_cli(styles={"header": "notacolor"}), ["--help"], color=color
+    )
+    assert isinstance(result.exception, StyleSyntaxError)
+
+    result = runner.invoke(
+        make_cli(styles={"header": "grey50 on #102030"}, use_theme="default"),
+        ["--help"],
+        color=color,
+    )
+    assert not result.exception
@@ -0,0 +1,78 @@
+import gc
+
+import click
+
+from click_rich_help import HelpCache, StyledCommand, StyledGroup
+
+
+def make_cli(cache):
+    @click.group(cls=StyledGroup, help_cache=cache)
+    def cli():
+        pass
+
+    @cli.command()
+    @click.option("--name", help="The person to greet.")
+    def command(name):
+        pass
+
+    return cli
+
+
+def test_help_cache_hits(runner):
+    cache = HelpCache()
+    cli = make_cli(cache)
+
+    first = runner.invoke(cli, ["command", "--help"], color=True)
+    second = runner.invoke(cli, ["command", "--help"], color=True)
+    assert not first.exception
+    assert first.output == second.output
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.entries) == (1, 1, 1)
+    assert stats.bytes > len(first.output)
+
+
+def test_help_cache_key_width(runner):
+    cache = HelpCache()
+    cli = make_cli(cache)
+
+    runner.invoke(cli, ["--help"], terminal_width=80)
+    runner.invoke(cli, ["--help"], terminal_width=120)
+    assert cache.stats().misses == 2
+
+
+def test_help_cache_eviction(runner):
+    cache = HelpCache(maxsize=1)
+    cli = make_cli(cache)
+
+    runner.invoke(cli, ["--help"])
+    runner.invoke(cli, ["command", "--help"])
+    stats = cache.stats()
+    assert (stats.evictions, stats.entries) == (1, 1)
+
+
+def test_help_cache_invalidate(runner):
+    cache = HelpCache()
+    cli = make_cli(cache)
+
+    runner.invoke(cli, ["--help"])
+    runner.invoke(cli, ["command", "--help"])
+    assert cache.invalidate(cli) == 1
+    assert len(cache) == 1
+
+    cache.clear()
+    assert cache.stats().entries == cache.stats().bytes == 0
+
+
+def test_help_cache_rebuilt_commands(runner):
+    cache = HelpCache()
+    for i in range(50):
+        cli = StyledCommand(name="cli", help=f"version {i}", help_cache=cache)
+        result = runner.invoke(cli, ["--help"])
+        assert f"version {i}" in result.output
+        del cli, result
+        gc.collect()
+
+    # pages of collected commands are dropped
+    assert cache.stats().entries == cache.stats().layouts == 0
+    assert cache.stats().bytes == 0
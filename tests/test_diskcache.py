@@ -0,0 +1,53 @@
+import click
+import pytest
+
+from click_rich_help import StyledGroup
+from click_rich_help.diskcache import DiskHelpCache, serve_help
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DiskHelpCache(tmp_path / "help")
+
+
+@pytest.fixture
+def source(tmp_path):
+    source = tmp_path / "cli.py"
+    source.write_text("# cli")
+    return source
+
+
+@click.group(cls=StyledGroup, styles={"header": "yellow"})
+def cli():
+    pass
+
+
+def test_serve_help(runner, cache, source, capsys):
+    serve_help(source, name="cli", args=["--help"], color=False, cache=cache)
+    result = runner.invoke(cli, ["--help"])
+    assert not result.exception
+
+    with pytest.raises(SystemExit) as exit:
+        serve_help(source, name="cli", args=["--help"], color=False, cache=cache)
+    assert exit.value.code == 0
+    assert capsys.readouterr().out == result.output
+
+
+def test_serve_help_ignores_other_args(cache, source):
+    serve_help(source, name="cli", args=["run"], cache=cache)
+    serve_help(source, name="cli", args=["--", "--help"], cache=cache)
+    assert not cache.directory.exists()
+
+
+def test_prune_stale_source(cache):
+    cache.store("cli", "a" * 64, "1" * 64, "old help")
+    cache.store("cli", "b" * 64, "1" * 64, "new help")
+    assert [p.read_text() for p in cache.directory.iterdir()] == ["new help"]
+
+
+def test_prune_max_bytes(cache):
+    cache.max_bytes = 10
+    cache.store("cli", "a" * 64, "1" * 64, "x" * 8)
+    cache.store("cli", "a" * 64, "2" * 64, "y" * 8)
+    assert cache.lookup("cli", "a" * 64, "1" * 64) is None
+    assert cache.lookup("cli", "a" * 64, "2" * 64) == "y" * 8
@@ -0,0 +1,145 @@
+import click
+import pytest
+
+from click_rich_help.__main__ import cli as main
+from click_rich_help.docs import MANIFEST_NAME, generate_docs
+
+
+def test_generate_docs(nested_cli, tmp_path):
+    result = generate_docs(nested_cli, tmp_path)
+    assert result.rendered == ["cli", "cli plain", "cli sub", "cli sub leaf"]
+    assert result.unchanged == result.removed == []
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        MANIFEST_NAME,
+        "cli-plain.html",
+        "cli-plain.md",
+        "cli-sub-leaf.html",
+        "cli-sub-leaf.md",
+        "cli-sub.html",
+        "cli-sub.md",
+        "cli.html",
+        "cli.md",
+        "index.md",
+    ]
+
+    page = (tmp_path / "cli-sub.md").read_text()
+    assert page.startswith("# cli sub\n\n```\nUsage: cli sub [OPTIONS] COMMAND")
+    assert "--name TEXT  who to greet [default: me]" in page
+    assert "\x1b" not in page
+    html = (tmp_path / "cli.html").read_text()
+    assert "<b>more</b>" not in html and "more" in html
+    assert "\x1b" not in html
+    assert (tmp_path / "index.md").read_text().splitlines()[2:] == [
+        "- [cli](cli.md)",
+        "- [cli plain](cli-plain.md)",
+        "- [cli sub](cli-sub.md)",
+        "- [cli sub leaf](cli-sub-leaf.md)",
+    ]
+
+
+def test_generate_docs_only_renders_changes(nested_cli, tmp_path):
+    generate_docs(nested_cli, tmp_path, formats=["md"])
+    result = generate_docs(nested_cli, tmp_path, formats=["md"])
+    assert result.rendered == []
+    assert result.unchanged == ["cli", "cli plain", "cli sub", "cli sub leaf"]
+
+    # the group page lists the short help of its commands
+    nested_cli.commands["plain"].help = "Say hi."
+    result = generate_docs(nested_cli, tmp_path, formats=["md"])
+    assert result.rendered == ["cli", "cli plain"]
+    assert "Say hi." in (tmp_path / "cli-plain.md").read_text()
+
+    leaf = nested_cli.commands["sub"].commands["leaf"]
+    leaf.params.append(click.Option(["--soon"], is_flag=True))
+    assert generate_docs(nested_cli, tmp_path, formats=["md"]).rendered == [
+        "cli sub leaf"
+    ]
+
+    nested_cli.styles = {"header": "blue"}
+    assert generate_docs(nested_cli, tmp_path, formats=["md"]).rendered == ["cli"]
+
+    (tmp_path / "cli-plain.md").unlink()
+    assert generate_docs(nested_cli, tmp_path, formats=["md"]).rendered == ["cli plain"]
+
+    result = generate_docs(nested_cli, tmp_path, formats=["md"], force=True)
+    assert len(result.rendered) == 4
+
+
+class Default:
+    def __init__(self, value):
+        self.value = value
+
+    def __repr__(self):
+        return f"Default({self.value!r})"
+
+    def __str__(self):
+        return str(self.value)
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        lambda cli: setattr(cli.commands["sub"], "option_groups", {"G": ["--name"]}),
+        lambda cli: setattr(cli, "command_groups", {"G": ["sub"]}),
+        lambda cli: cli.commands["sub"].context_settings.update(show_default=True),
+        lambda cli: cli.context_settings.update(help_option_names=["-h", "--help"]),
+        lambda cli: cli.context_settings.update(max_content_width=120),
+        lambda cli: cli.commands["sub"].params[0].__setattr__("default", Default(2)),
+    ],
+    ids=[
+        "option_groups",
+        "command_groups",
+        "show_default",
+        "help_option_names",
+        "max_content_width",
+        "default",
+    ],
+)
+def test_generate_docs_renders_help_settings(nested_cli, tmp_path, change):
+    nested_cli.commands["sub"].params[0].default = Default(1)
+    generate_docs(nested_cli, tmp_path, formats=["md"])
+    change(nested_cli)
+    assert generate_docs(nested_cli, tmp_path, formats=["md"]).rendered
+
+
+def test_generate_docs_settings_render_everything(nested_cli, tmp_path):
+    generate_docs(nested_cli, tmp_path, formats=["md"])
+    assert (
+        len(generate_docs(nested_cli, tmp_path, formats=["md"], width=60).rendered) == 4
+    )
+    assert len(generate_docs(nested_cli, tmp_path, width=60).rendered) == 4
+
+
+def test_generate_docs_removes_pages(nested_cli, tmp_path):
+    generate_docs(nested_cli, tmp_path)
+    del nested_cli.commands["plain"]
+    result = generate_docs(nested_cli, tmp_path)
+    assert result.removed == ["cli plain"]
+    assert result.rendered == ["cli"]
+    assert not (tmp_path / "cli-plain.md").exists()
+    assert not (tmp_path / "cli-plain.html").exists()
+
+
+def test_generate_docs_bad_format(nested_cli, tmp_path):
+    with pytest.raises(ValueError, match="formats must be some of"):
+        generate_docs(nested_cli, tmp_path, formats=["pdf"])
+
+
+def test_docs_command(runner, tmp_path, write_module):
+    write_module(
+        "docs_plugin",
+        "import click\n"
+        "from click_rich_help import StyledGroup\n"
+        "cli = StyledGroup(name='tool', commands=[click.Command('run')])\n",
+    )
+    output = tmp_path / "out"
+
+    args = ["docs", "docs_plugin:cli", "-o", str(output), "-f", "md"]
+    result = runner.invoke(main, args)
+    assert result.exit_code == 0, result.output
+    assert result.output == f"rendered 2, unchanged 0, removed 0 pages in {output}\n"
+    assert (output / "tool-run.md").exists()
+    assert not (output / "tool-run.html").exists()
+
+    result = runner.invoke(main, args)
+    assert result.output == f"rendered 0, unchanged 2, removed 0 pages in {output}\n"
@@ -111,3 +111,35 @@ def test_unknown_option(runner):
         str(result.exception)
         == "Unable to find option '--unknown-option' in list of options"
     )
+
+
+def test_option_group_exact_match(runner):
+    @click.command(
+        cls=StyledCommand,
+        option_groups={"Output": ["-o", "--no-color"], "Missing": ["--out", "--x"]},
+    )
+    @click.option("-o", "--output", help="output file")
+    @click.option("--color/--no-color", help="colorize")
+    def cli(output, color):
+        pass
+
+    result = runner.invoke(cli, ["--help"])
+    assert isinstance(result.exception, ValueError)
+    assert (
+        str(result.exception)
+        == "Unable to find options '--out', '--x' in list of options"
+    )
+
+    cli.option_groups = {"Output": ["-o", "--no-color"]}
+    result = runner.invoke(cli, ["--help"])
+    assert not result.exception
+    assert result.output.splitlines() == [
+        "Usage: cli [OPTIONS]",
+        "",
+        "Output:",
+        "  -o, --output TEXT     output file",
+        "  --color / --no-color  colorize",
+        "",
+        "Options:",
+        "  --help  Show this message and exit.",
+    ]
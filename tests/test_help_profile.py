@@ -0,0 +1,54 @@
+import pstats
+
+import click
+
+from click_rich_help import HelpCache, StyledGroup
+
+
+def make_cli(**kwargs):
+    @click.group(cls=StyledGroup, **kwargs)
+    def cli():
+        pass
+
+    @cli.command()
+    @click.argument("name")
+    def hello(name):
+        """Say hello."""
+
+    return cli
+
+
+def test_help_profile(runner, tmp_path):
+    cli = make_cli(help_profile=True)
+    path = tmp_path / "help.pstats"
+
+    result = runner.invoke(cli, ["--help-profile", str(path)])
+    assert not result.exception, result.output
+    assert result.output.startswith(runner.invoke(cli, ["--help"]).output)
+    assert "--help-profile" not in result.output
+    assert f"Wrote profile to {path}" in result.output
+
+    stats = pstats.Stats(str(path))
+    assert any(name == "_get_help" for _, _, name in stats.stats)
+    report = (tmp_path / "help.allocations.txt").read_text()
+    assert report.startswith("Top 25 of ")
+
+
+def test_help_profile_subcommand(runner, tmp_path):
+    cache = HelpCache()
+    cli = make_cli(help_profile=True, help_cache=cache)
+    path = tmp_path / "hello.pstats"
+
+    # the required argument isn't checked and the cache is skipped
+    runner.invoke(cli, ["hello", "--help"])
+    result = runner.invoke(cli, ["hello", "--help-profile", str(path)])
+    assert not result.exception, result.output
+    assert "Say hello." in result.output
+    assert path.exists()
+    assert cache.stats().hits == 0
+
+
+def test_help_profile_opt_in(runner, tmp_path):
+    result = runner.invoke(make_cli(), ["--help-profile", str(tmp_path / "p")])
+    assert result.exit_code == 2
+    assert "No such option: --help-profile" in result.output
@@ -0,0 +1,113 @@
+import click
+import pytest
+
+from click_rich_help import HelpRecord, HelpStylesFormatter, StyledCommand
+
+
+def test_exotic_options(runner):
+    @click.command(cls=StyledCommand, context_settings={"auto_envvar_prefix": "APP"})
+    @click.option("--shape", type=click.Choice(["a", "b"]), nargs=2, help="shapes")
+    @click.option(
+        "--level", type=click.IntRange(1, 5), default=2, show_default=True, help="lvl"
+    )
+    @click.option("--token", show_envvar=True, help="api token")
+    @click.option("/debug;/no-debug", default=False, show_default=True)
+    @click.option("-v", "--verbose", count=True, help="more output")
+    @click.option("--file-name", metavar="FILE-NAME", help="a file")
+    @click.option("--x", default="[a]", show_default=True, required=True)
+    def cli(**kwargs):
+        pass
+
+    result = runner.invoke(cli, ["--help"])
+    assert not result.exception
+    assert result.output.splitlines() == [
+        "Usage: cli [OPTIONS]",
+        "",
+        "Options:",
+        "  --shape [a|b]...       shapes",
+        "  --level INTEGER RANGE  lvl [default: 2; 1<=x<=5]",
+        "  --token TEXT           api token [env var: APP_TOKEN]",
+        "  /debug; /no-debug      [default: no-debug]",
+        "  -v, --verbose          more output",
+        "  --file-name FILE-NAME  a file",
+        "  --x TEXT               [default: [a]; required]",
+        "  --help                 Show this message and exit.",
+    ]
+
+
+def test_record_styles(runner):
+    @click.command(
+        cls=StyledCommand,
+        styles={"option": "green", "metavar": "red", "default": "blue"},
+        option_custom_styles={"-s": "yellow"},
+    )
+    @click.option("-s", "--shape", type=click.Choice(["a", "b"]), nargs=2)
+    @click.option("--shout/--no-shout", help="loud", default=True, show_default=True)
+    def cli(**kwargs):
+        pass
+
+    result = runner.invoke(cli, ["--help"], color=True)
+    assert not result.exception
+    assert result.output.splitlines()[3:5] == [
+        "  \x1b[33m-s, --shape \x1b[0m[\x1b[31ma\x1b[0m|\x1b[31mb\x1b[0m]\x1b[31m...\x1b[0m  ",
+        "  \x1b[32m--shout\x1b[0m / \x1b[32m--no-shout\x1b[0m  loud \x1b[34m[default: shout]\x1b[0m",
+    ]
+
+
+def test_overridden_help_record():
+    class Option(click.Option):
+        def get_help_record(self, ctx):
+            return ("--custom", "custom help")
+
+    @click.command(cls=StyledCommand)
+    @click.option("--name", cls=Option)
+    @click.option("--other")
+    def cli(**kwargs):
+        pass
+
+    formatter = HelpStylesFormatter()
+    rows = []
+    formatter.write_dl = rows.extend
+    cli.format_options(click.Context(cli), formatter)
+    assert rows[0] == ("--custom", "custom help")
+    assert isinstance(rows[1], HelpRecord) and rows[1].flags == ("--other",)
+
+
+@pytest.mark.parametrize("ctx_show_default", [None, True, False])
+def test_extras_match_click(ctx_show_default):
+    @click.command(
+        cls=StyledCommand,
+        context_settings={
+            "show_default": ctx_show_default,
+            "auto_envvar_prefix": "APP",
+        },
+    )
+    @click.option("--flag", is_flag=True)
+    @click.option("--on-flag", is_flag=True, default=True)
+    @click.option("--shout/--no-shout", default=False)
+    @click.option("--name", default="world")
+    @click.option("--token", default="secret", show_default=False)
+    @click.option("--shown", default="x", show_default=True)
+    @click.option("--label", show_default="some label")
+    @click.option("--level", type=click.IntRange(1, 5), default=2, help="how loud")
+    @click.option("-v", "--verbose", count=True)
+    @click.option("--size", type=click.FloatRange(0, clamp=True), required=True)
+    @click.option("--item", multiple=True, default=("a", "b"))
+    @click.option("--seed", default=lambda: 4)
+    @click.option("--user", show_envvar=True)
+    def cli(**kwargs):
+        pass
+
+    ctx = click.Context(cli, color=False, terminal_width=100, **cli.context_settings)
+    records = [param.get_help_record(ctx) for param in cli.get_params(ctx)]
+    formatter = click.HelpFormatter(width=100)
+    with formatter.section("Options"):
+        # the extras follow the help after one space rather than click's two
+        formatter.write_dl(
+            [(term, help.replace("  [", " [")) for term, help in filter(None, records)]
+        )
+    # and rows without help are padded as if they had some
+    lines = click.unstyle(cli.get_help(ctx)).partition("Options:\n")[2].splitlines()
+    assert [line.rstrip() for line in lines] == (
+        formatter.getvalue().partition("Options:\n")[2].splitlines()
+    )
@@ -0,0 +1,109 @@
+import subprocess
+import sys
+
+import pytest
+
+# generous enough for slow CI machines, importing rich eagerly would blow past it
+IMPORT_BUDGET_US = 250_000
+
+
+def import_times(statement):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.split("|")
+        # nested imports are indented, keep only the top level cumulative time
+        times.setdefault(module.strip(), int(cumulative) if module[1] != " " else 0)
+    return times
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "import click_rich_help",
+        "from click_rich_help import StyledGroup, StyledCommand, version_option",
+    ],
+)
+def test_rich_not_imported(statement):
+    times = import_times(statement)
+    assert not [module for module in times if module.split(".")[0] == "rich"]
+    total = sum(
+        time for module, time in times.items() if module.startswith("click_rich_help")
+    )
+    assert total < IMPORT_BUDGET_US
+
+
+def test_default_theme_parsed_when_used():
+    from rich.console import Console
+    from rich.style import Style
+
+    from click_rich_help.core import _LazyTheme
+
+    theme = _LazyTheme({"header": "bold italic cyan"})
+    assert theme.styles == {"header": Style.parse("bold italic cyan")}
+    assert Console(theme=theme).get_style("header") == Style.parse("bold italic cyan")
+
+
+def test_diskcache_skips_click():
+    times = import_times("from click_rich_help.diskcache import serve_help")
+    assert "click" not in times
+    assert "rich" not in times
+
+
+PIPED_HELP = """
+import sys
+import click
+from click_rich_help import StyledCommand
+
+@click.command(cls=StyledCommand, styles={"header": "red"})
+@click.option("--name", help="[b]who[/] to greet", default="me", show_default=True)
+def cli(name):
+    pass
+
+cli(["--help"], prog_name="cli", standalone_mode=False)
+print("rich" in sys.modules, file=sys.stderr)
+"""
+
+
+def test_piped_help_skips_rich():
+    result = subprocess.run(
+        [sys.executable, "-c", PIPED_HELP], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.splitlines() == [
+        "Usage: cli [OPTIONS]",
+        "",
+        "Options:",
+        "  --name TEXT  who to greet [default: me]",
+        "  --help       Show this message and exit.",
+    ]
+    assert result.stderr.strip() == "False"
+
+
+VERSION = """
+import sys
+import click
+from click_rich_help import version_option
+
+@click.command()
+@version_option(version="1.0", prog_name_style="bold red", version_style="green")
+def cli():
+    pass
+
+cli(["--version"], prog_name="cli", standalone_mode=False)
+print("rich" in sys.modules, file=sys.stderr)
+"""
+
+
+def test_version_skips_rich():
+    result = subprocess.run(
+        [sys.executable, "-c", VERSION], capture_output=True, text=True, check=True
+    )
+    assert result.stdout == "cli, version 1.0\n"
+    assert result.stderr.strip() == "False"
@@ -0,0 +1,107 @@
+import click
+import pytest
+
+from click_rich_help import HelpCache, HelpLayout, StyledGroup
+from click_rich_help.core import _new_formatter
+
+
+def make_cli(cache=None, short_help=None):
+    @click.group(
+        cls=StyledGroup,
+        styles={"doc_style": "green", "info": "bold red"},
+        help_cache=cache,
+    )
+    @click.option(
+        "--name",
+        default="world",
+        show_default=True,
+        help="The [info]person[/info] to greet, who is greeted more than once if "
+        "there is enough room to do so.",
+    )
+    def cli(name):
+        """
+        A [b]long[/b] docstring with [info]markup[/info] which is wrapped at
+        every width.
+
+        \b
+        An unwrapped
+        paragraph.
+        """
+
+    @cli.command(short_help=short_help)
+    def command():
+        """Do something."""
+
+    return cli
+
+
+def render(cli, width, color=True):
+    ctx = click.Context(cli, info_name="cli", terminal_width=width, color=color)
+    formatter = _new_formatter(cli, width, 100, not color)
+    cli.format_help(ctx, formatter)
+    return formatter
+
+
+@pytest.mark.parametrize("color", [True, False])
+@pytest.mark.parametrize("width", [30, 50, 79, 120])
+def test_layout_matches_render(color, width):
+    cli = make_cli()
+    layout = render(cli, 80, color).get_layout()
+    assert layout.covers(width)
+    assert layout.render(width) == render(cli, width, color).getvalue()
+
+
+def test_layout_reused_by_cache(runner):
+    cache = HelpCache()
+    cli = make_cli(cache)
+
+    runner.invoke(cli, ["--help"], color=True, terminal_width=80)
+    result = runner.invoke(cli, ["--help"], color=True, terminal_width=50)
+    assert not result.exception
+    assert (
+        result.output
+        == runner.invoke(make_cli(), ["--help"], color=True, terminal_width=50).output
+    )
+
+    stats = cache.stats()
+    assert (stats.misses, stats.entries, stats.layouts, stats.reflows) == (2, 2, 1, 1)
+
+
+def test_uncovered_layout_not_counted_as_reflow(runner):
+    cache = HelpCache()
+    cli = make_cli(cache)
+    cli.commands["command"].help = "Words " * 20
+
+    runner.invoke(cli, ["--help"], color=True, terminal_width=60)
+    runner.invoke(cli, ["--help"], color=True, terminal_width=80)
+    stats = cache.stats()
+    assert (stats.misses, stats.entries, stats.reflows) == (2, 2, 0)
+
+
+def test_layout_only_covers_width_of_cut_short_help():
+    cli = make_cli(short_help=None)
+    cli.commands["command"].help = "Words " * 20
+    formatter = render(cli, 60)
+    layout = formatter.get_layout()
+    assert (layout.min_width, layout.max_width) == (60, 60)
+    assert not layout.covers(80)
+    with pytest.raises(ValueError):
+        layout.render(80)
+
+
+def test_layout_of_full_short_help_covers_wider_widths():
+    layout = render(make_cli(), 60).get_layout()
+    # "Do something." after the longest command name and 6 spaces
+    assert layout.min_width == len("Do something.") + 6 + len("command")
+    assert layout.max_width is None
+
+
+def test_reading_width_limits_layout():
+    class Command(StyledGroup):
+        def format_epilog(self, ctx, formatter):
+            formatter.write("-" * formatter.width)
+
+    cli = Command(name="cli")
+    layout = render(cli, 70).get_layout()
+    assert isinstance(layout, HelpLayout)
+    assert (layout.min_width, layout.max_width) == (70, 70)
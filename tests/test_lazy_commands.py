@@ -0,0 +1,60 @@
+import sys
+
+import click
+import pytest
+
+from click_rich_help import StyledGroup
+
+MODULE = '''
+import click
+
+@click.command()
+@click.option("--name", help="The person to greet.")
+def hello(name):
+    """Say hello to NAME."""
+    click.echo(f"hello {name}")
+'''
+
+
+@pytest.fixture
+def cli(write_module):
+    write_module("lazy_plugin", MODULE)
+
+    @click.group(cls=StyledGroup, styles={"header": "yellow", "option": "green"})
+    def cli():
+        pass
+
+    @cli.command()
+    def eager():
+        pass
+
+    cli.add_lazy_command("hello", "lazy_plugin:hello", short_help="Say hello.")
+    cli.add_lazy_command("secret", "lazy_plugin:hello", hidden=True)
+    return cli
+
+
+def test_lazy_command_help(runner, cli):
+    result = runner.invoke(cli, ["--help"], color=True)
+    assert not result.exception
+    assert "lazy_plugin" not in sys.modules
+    assert result.output.splitlines()[-3:] == [
+        "\x1b[33mCommands\x1b[0m:",
+        "  \x1b[32meager\x1b[0m  ",
+        "  \x1b[32mhello\x1b[0m  Say hello.",
+    ]
+
+
+def test_lazy_command_invoke(runner, cli):
+    result = runner.invoke(cli, ["hello", "--name", "bob"])
+    assert not result.exception
+    assert result.output == "hello bob\n"
+    assert "lazy_plugin" in sys.modules
+
+
+def test_lazy_command_invalid_path(cli):
+    with pytest.raises(ValueError):
+        cli.add_lazy_command("bad", "lazy_plugin.hello")
+
+    cli.add_lazy_command("bad", "lazy_plugin:click")
+    with pytest.raises(TypeError):
+        cli.get_command(None, "bad")
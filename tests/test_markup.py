@@ -0,0 +1,59 @@
+import pytest
+
+from click_rich_help import HelpStylesFormatter
+from click_rich_help.utils import _colorize, _parse_markup
+
+MARKUP = [
+    "[b]who[/b] to greet",
+    "[info]nested [b]bold[/] info[/info] and [red bold]red[/bold red]",
+    "multi\n[u]line[/u]\n\n[i]text",
+    "\\[b] escaped and [not bold]not bold[/]",
+    "[unknown]no such style[/unknown] a:not-an-emoji:c",
+]
+
+
+@pytest.fixture
+def formatter():
+    return HelpStylesFormatter(
+        styles={"doc_style": "italic green", "info": "blue on white"}, width=40
+    )
+
+
+@pytest.mark.parametrize("text", MARKUP)
+@pytest.mark.parametrize("style", ["doc_style", "bold", "none"])
+def test_markup_matches_rich(formatter, text, style):
+    assert formatter._colorize_markup(text, style) == _colorize(
+        formatter.console, text, style
+    )
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "[link=https://example.com]link[/link]",
+        "[@click=app.bell]meta[/]",
+        ":smiley: emoji",
+        "[b]unbalanced[/i]",
+        "wide 中文",
+    ],
+)
+def test_markup_rendered_by_rich(formatter, text):
+    assert _parse_markup(text) is None
+    assert formatter._colorize_markup(text, "doc_style") is None
+
+
+def test_markup_wider_than_console(formatter):
+    # lines are wrapped by the formatter, never by rich
+    text = "[b]" + "x" * (formatter.console.width + 1)
+    assert formatter._colorize_markup(text, "doc_style") == _colorize(
+        formatter.console, text, "doc_style"
+    )
+    assert "\n" not in formatter._colorize(text, "doc_style")
+
+
+def test_markup_parsed_once(formatter):
+    text = "[b]parsed[/b] once"
+    formatter._colorize(text, "doc_style")
+    hits = _parse_markup.cache_info().hits
+    formatter._colorize(text, "doc_style")
+    assert _parse_markup.cache_info().hits == hits + 1
@@ -1,6 +1,14 @@
+import gc
+
 import click
+import pytest
 
-from click_rich_help import StyledGroup, StyledMultiCommand
+from click_rich_help import (
+    CommandSummary,
+    StyledCommand,
+    StyledGroup,
+    StyledMultiCommand,
+)
 
 
 def test_multi_command(runner):
@@ -70,3 +78,104 @@ def test_multi_command(runner):
         "\x1b[31mCommands\x1b[0m:",
         "  \x1b[34mcommand2\x1b[0m  ",
     ]
+
+
+def test_resolved_commands_are_reused(runner):
+    commands = {"cmd": click.Command("cmd", help="A plain command.")}
+
+    class MyCLI(StyledMultiCommand):
+        def list_commands(self, ctx):
+            return list(commands)
+
+        def get_command(self, ctx, name):
+            return commands.get(name)
+
+    cli = MyCLI(name="cli", styles={"header": "yellow"})
+    ctx = click.Context(cli)
+
+    _, first, _ = cli.resolve_command(ctx, ["cmd"])
+    _, second, _ = cli.resolve_command(ctx, ["cmd"])
+    assert isinstance(first, StyledCommand)
+    assert first is second
+    assert first.styles == {"header": "yellow"}
+
+    cli.styles = {"header": "red"}
+    _, third, _ = cli.resolve_command(ctx, ["cmd"])
+    assert third is first and third.styles == {"header": "red"}
+
+    result = runner.invoke(cli, ["cmd", "--help"])
+    assert not result.exception
+    assert "A plain command." in result.output
+
+    del commands["cmd"], first, second, third
+    gc.collect()
+    assert len(cli._styled_commands) == 0
+
+
+class PluginCLI(StyledMultiCommand):
+    summaries = [
+        CommandSummary("fit", "Fit a model.", group="Models"),
+        CommandSummary("old", "Fit it the old way.", deprecated=True),
+        CommandSummary("debug", "Debug a plugin.", hidden=True),
+        CommandSummary("serve", "Serve a model.", group="Models"),
+    ]
+
+    def list_command_summaries(self, ctx):
+        return self.summaries
+
+    def list_commands(self, ctx):
+        return [summary.name for summary in self.summaries]
+
+    def get_command(self, ctx, name):
+        raise AssertionError(f"{name} loaded")
+
+
+def test_summaries_listed_without_loading_commands(runner):
+    result = runner.invoke(PluginCLI(name="cli"), ["--help"])
+    assert not result.exception
+    assert result.output.splitlines()[-6:] == [
+        "Models:",
+        "  fit    Fit a model.",
+        "  serve  Serve a model.",
+        "",
+        "Commands:",
+        "  old  (Deprecated) Fit it the old way.",
+    ]
+
+
+def test_summary_groups_merged_with_command_groups(runner):
+    class CLI(StyledGroup):
+        def list_command_summaries(self, ctx):
+            return PluginCLI.summaries
+
+    cli = CLI(name="cli", command_groups={"Legacy": ["old", "serve"]})
+    result = runner.invoke(cli, ["--help"])
+    assert not result.exception
+    assert result.output.splitlines()[-6:] == [
+        "Legacy:",
+        "  old    (Deprecated) Fit it the old way.",
+        "  serve  Serve a model.",
+        "",
+        "Models:",
+        "  fit  Fit a model.",
+    ]
+
+
+@pytest.mark.parametrize("cls", [StyledGroup, StyledMultiCommand])
+def test_commands_loaded_without_summaries(runner, cls):
+    class CLI(cls):
+        def list_command_summaries(self, ctx):
+            return None
+
+        def list_commands(self, ctx):
+            return ["cmd"]
+
+        def get_command(self, ctx, name):
+            return click.Command(name, short_help="A loaded command.")
+
+    result = runner.invoke(CLI(name="cli"), ["--help"])
+    assert not result.exception
+    assert result.output.splitlines()[-2:] == [
+        "Commands:",
+        "  cmd  A loaded command.",
+    ]
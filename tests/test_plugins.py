@@ -0,0 +1,136 @@
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from click_rich_help import EntryPointMultiCommand, StyledCommand, plugins, utils
+
+PLUGIN = """
+import click
+
+@click.command(help="Fit a model to the data. Slowly.")
+def fit():
+    click.echo("fitting")
+
+
+@click.command(short_help="Serve a model.", deprecated=True)
+def serve():
+    pass
+
+
+@click.command(hidden=True)
+def debug():
+    pass
+
+
+not_a_command = 1
+"""
+
+
+@pytest.fixture
+def entry_points(tmp_path, monkeypatch, write_module):
+    monkeypatch.setenv("CLICK_RICH_HELP_CACHE_DIR", str(tmp_path / "cache"))
+    site_packages = tmp_path / "site-packages"
+    site_packages.mkdir()
+    monkeypatch.syspath_prepend(str(site_packages))
+    module = write_module("my_plugin", PLUGIN)
+
+    eps = [
+        SimpleNamespace(name=name, value=f"my_plugin:{name}")
+        for name in ("serve", "fit", "debug")
+    ]
+    scans = []
+
+    def fake_entry_points(group):
+        scans.append(group)
+        return eps if group == "my_cli.commands" else []
+
+    monkeypatch.setattr(plugins, "_entry_points", fake_entry_points)
+    return SimpleNamespace(
+        eps=eps, scans=scans, site_packages=site_packages, module=module
+    )
+
+
+def make_cli():
+    return EntryPointMultiCommand("my_cli.commands", name="cli")
+
+
+def test_help_lists_plugins(runner, entry_points):
+    result = runner.invoke(make_cli(), ["--help"], terminal_width=80)
+    assert not result.exception, result.output
+    assert result.output.splitlines()[-3:] == [
+        "Commands:",
+        "  fit    Fit a model to the data.",
+        "  serve  (Deprecated) Serve a model.",
+    ]
+
+
+def test_manifest_reused_without_loading_plugins(runner, entry_points):
+    first = runner.invoke(make_cli(), ["--help"]).output
+    assert make_cli().manifest_path.is_file()
+    del sys.modules["my_plugin"]
+
+    result = runner.invoke(make_cli(), ["--help"])
+    assert result.output == first
+    assert entry_points.scans == ["my_cli.commands"]
+    assert "my_plugin" not in sys.modules
+
+
+def test_plugin_loaded_when_invoked(runner, entry_points):
+    runner.invoke(make_cli(), ["--help"])
+    del sys.modules["my_plugin"]
+
+    result = runner.invoke(make_cli(), ["fit"])
+    assert not result.exception
+    assert result.output == "fitting\n"
+
+    result = runner.invoke(make_cli(), ["fit", "--help"])
+    assert "Fit a model to the data. Slowly." in result.output
+    assert make_cli().get_command(None, "fit") is sys.modules["my_plugin"].fit
+    assert make_cli().get_command(None, "missing") is None
+
+
+def test_manifest_rebuilt_when_site_packages_change(
+    runner, entry_points, tmp_path, monkeypatch
+):
+    runner.invoke(make_cli(), ["--help"])
+    entry_points.eps.pop()
+    entry_points.eps.append(SimpleNamespace(name="other", value="my_plugin:fit"))
+
+    # other directories on sys.path, such as the current one, don't matter
+    (entry_points.module.parent / "notes.txt").write_text("changed")
+    monkeypatch.chdir(tmp_path)
+    assert make_cli().list_commands(None) == ["debug", "fit", "serve"]
+
+    (entry_points.site_packages / "other-1.0.dist-info").mkdir()
+    assert make_cli().list_commands(None) == ["fit", "other", "serve"]
+    assert len(entry_points.scans) == 2
+
+
+def test_entry_points_need_importlib_metadata(monkeypatch):
+    monkeypatch.setitem(sys.modules, "importlib.metadata", None)
+    monkeypatch.setitem(sys.modules, "importlib_metadata", None)
+    with pytest.raises(ImportError, match="my_cli.commands entry points"):
+        utils._entry_points("my_cli.commands")
+
+
+def test_broken_plugin_listed_and_retried(runner, entry_points):
+    entry_points.eps.append(SimpleNamespace(name="broken", value="my_plugin:nope"))
+    entry_points.eps.append(
+        SimpleNamespace(name="number", value="my_plugin:not_a_command")
+    )
+
+    result = runner.invoke(make_cli(), ["--help"])
+    assert not result.exception, result.output
+    assert "  broken  \n" in result.output
+    assert "  number  \n" in result.output
+    assert not make_cli().manifest_path.exists()
+
+    result = runner.invoke(make_cli(), ["number"])
+    assert isinstance(result.exception, TypeError)
+
+
+def test_styled_subcommands(runner, entry_points):
+    cli = make_cli()
+    _, cmd, _ = cli.resolve_command(None, ["fit"])
+    assert isinstance(cmd, StyledCommand)
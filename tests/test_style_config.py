@@ -0,0 +1,44 @@
+import click
+import pytest
+
+from click_rich_help import StyleConfig, StyledGroup
+
+
+def test_style_config_interned():
+    config = StyleConfig({"header": "red"}, use_theme="default")
+    assert StyleConfig({"header": "red"}, use_theme="default") is config
+    assert StyleConfig({"header": "blue"}, use_theme="default") is not config
+    assert StyleConfig({}) is not StyleConfig()
+
+    with pytest.raises(AttributeError, match="immutable"):
+        config.styles = {}
+    with pytest.raises(TypeError):
+        config.styles["header"] = "blue"
+
+    replaced = config.replace(use_theme=None)
+    assert replaced is StyleConfig({"header": "red"})
+    assert config.use_theme == "default"
+
+
+def test_style_config_shared_by_children(runner):
+    @click.group(cls=StyledGroup, styles={"header": "red"})
+    def cli():
+        pass
+
+    for i in range(3):
+        cli.command(f"cmd-{i}")(lambda: None)
+
+    @cli.command(styles={"option": "green"})
+    def other():
+        pass
+
+    configs = {cmd.style_config for cmd in cli.commands.values()}
+    assert len(configs) == 2
+    assert cli.commands["cmd-0"].style_config is cli.style_config
+    assert other.styles == {"header": "red", "option": "green"}
+
+    # copy on write, the siblings keep the shared config
+    cli.commands["cmd-0"].styles = {"header": "blue"}
+    assert cli.commands["cmd-1"].style_config is cli.style_config
+    result = runner.invoke(cli, ["cmd-0", "--help"], color=True)
+    assert result.output.startswith("\x1b[34mUsage\x1b[0m")
@@ -0,0 +1,51 @@
+import pytest
+
+from click_rich_help import HelpStylesFormatter
+from click_rich_help.utils import _colorize, _colorize_many
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "plain text",
+        "multi\nline\n\ntext",
+        "  padded  ",
+        "[b]markup[/]",
+        "[OPTIONS] COMMAND [ARGS]...",
+        r"escaped \\[b] tag",
+        "emoji :+1:",
+        "long text " * 20,
+    ],
+)
+@pytest.mark.parametrize("style", ["header", "option", "doc_style", "bold"])
+def test_precompiled_matches_rich(text, style):
+    formatter = HelpStylesFormatter(
+        styles={"header": "bold italic cyan", "option": "green on black"}
+    )
+    assert formatter._colorize(text, style) == _colorize(formatter.console, text, style)
+
+
+def test_formatters_share_renderer(monkeypatch):
+    styles = {"header": "yellow", "option": "green"}
+    formatter = HelpStylesFormatter(styles=styles)
+    assert HelpStylesFormatter(styles=dict(styles)).console is formatter.console
+    assert (
+        HelpStylesFormatter(styles={"header": "red"}).console is not formatter.console
+    )
+
+    monkeypatch.setenv("NO_COLOR", "1")
+    assert HelpStylesFormatter(styles=styles).console is not formatter.console
+
+
+def test_batched_render_matches_rich():
+    formatter = HelpStylesFormatter(styles={"header": "red", "doc_style": "green"})
+    fragments = [
+        ("[b]bold[/] text", "header"),
+        ("", "doc_style"),
+        ("long [i]markup[/] " * 20, "doc_style"),
+        ("multi\n\nline [u]markup[/]\n", "header"),
+        (":+1: emoji", "bold"),
+    ]
+    assert _colorize_many(formatter.console, fragments) == [
+        _colorize(formatter.console, text, style) for text, style in fragments
+    ]
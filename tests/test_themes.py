@@ -0,0 +1,131 @@
+import os
+
+import click
+import pytest
+
+import click_rich_help.core
+from click_rich_help import StyledCommand, themes
+
+TOML_THEME = """
+[styles]
+header = "bold   red"
+option = "green"
+"""
+
+INI_THEME = """
+[styles]
+header = blue
+option = "yellow"
+"""
+
+
+@pytest.fixture(autouse=True)
+def theme_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(click_rich_help.core, "THEMES", {"default": {}})
+    monkeypatch.setenv("CLICK_RICH_HELP_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv(themes.THEME_PATH_ENV_VAR, str(tmp_path / "themes"))
+    monkeypatch.setattr(themes, "_entry_points", lambda: [])
+    directory = tmp_path / "themes"
+    directory.mkdir()
+    (directory / "org.toml").write_text(TOML_THEME)
+    (directory / "legacy.ini").write_text(INI_THEME)
+    return directory
+
+
+def make_cli(theme):
+    @click.command(cls=StyledCommand, use_theme=theme)
+    @click.option("--name", help="who to greet")
+    def cli(name):
+        pass
+
+    return cli
+
+
+@pytest.mark.parametrize(
+    "theme, expected",
+    [
+        ("org", "\x1b[1;31mOptions\x1b[0m:"),
+        ("legacy", "\x1b[34mOptions\x1b[0m:"),
+    ],
+)
+def test_theme_files(runner, theme, expected):
+    result = runner.invoke(make_cli(theme), ["--help"], color=True)
+    assert not result.exception, result.output
+    assert result.output.splitlines()[2] == expected
+
+
+def test_theme_path(runner, theme_dir):
+    cli = make_cli(str(theme_dir / "org.toml"))
+    result = runner.invoke(cli, ["--help"], color=True)
+    assert result.output.splitlines()[2] == "\x1b[1;31mOptions\x1b[0m:"
+
+
+def test_theme_file_cached(theme_dir, monkeypatch):
+    path = theme_dir / "org.toml"
+    assert themes.load_theme_file(path) == {"header": "bold red", "option": "green"}
+
+    def compile_styles(path, styles):
+        raise AssertionError("theme compiled again")
+
+    monkeypatch.setattr(themes, "_compile_styles", compile_styles)
+    assert themes.load_theme_file(path)["header"] == "bold red"
+
+    path.write_text(TOML_THEME.replace("red", "magenta"))
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    monkeypatch.undo()
+    assert themes.load_theme_file(path)["header"] == "bold magenta"
+
+
+def test_theme_entry_point(runner, monkeypatch, theme_dir):
+    class EntryPoint:
+        def __init__(self, name, theme):
+            self.name = name
+            self.theme = theme
+
+        def load(self):
+            return self.theme
+
+    monkeypatch.setattr(
+        themes,
+        "_entry_points",
+        lambda: [
+            EntryPoint("shipped", {"header": "green"}),
+            EntryPoint("shipped-file", theme_dir / "legacy.ini"),
+        ],
+    )
+    result = runner.invoke(make_cli("shipped"), ["--help"], color=True)
+    assert result.output.splitlines()[2] == "\x1b[32mOptions\x1b[0m:"
+    result = runner.invoke(make_cli("shipped-file"), ["--help"], color=True)
+    assert result.output.splitlines()[2] == "\x1b[34mOptions\x1b[0m:"
+    assert themes.available_themes() == ["legacy", "org", "shipped", "shipped-file"]
+
+
+def test_invalid_theme_file(theme_dir):
+    (theme_dir / "broken.toml").write_text('[styles]\nheader = "bold nope"\n')
+    with pytest.raises(ValueError, match="Invalid style 'header' in theme"):
+        themes.load_theme("broken")
+
+    (theme_dir / "empty.ini").write_text("[colors]\n")
+    with pytest.raises(ValueError, match="has no \\[styles\\] section"):
+        themes.load_theme("empty")
+
+
+def test_unknown_theme(runner):
+    result = runner.invoke(make_cli("missing"), ["--help"], color=True)
+    assert result.exit_code == 2
+    assert "missing isn't one of ['default', 'legacy', 'org']" in result.output
+
+
+@pytest.mark.parametrize(
+    "theme, message",
+    [
+        ("missing.toml", "Unable to load theme missing.toml"),
+        ("broken", "Invalid style 'header' in theme"),
+    ],
+)
+def test_theme_errors_are_bad_parameters(runner, theme_dir, theme, message):
+    (theme_dir / "broken.toml").write_text('[styles]\nheader = "bold nope"\n')
+    result = runner.invoke(make_cli(theme), ["--help"], color=True)
+    assert result.exit_code == 2
+    assert message in result.output
@@ -0,0 +1,101 @@
+import click
+import pytest
+
+from click_rich_help import StyledGroup, StyledMultiCommand, trace
+
+
+@pytest.fixture
+def traces():
+    collected = []
+    trace.set_trace_sink(collected.append)
+    yield collected
+    trace.set_trace_sink(None)
+
+
+@pytest.fixture
+def cli():
+    # styles no other test uses, so the renderer isn't pooled yet
+    @click.group(cls=StyledGroup, styles={"header": "bold #123456"})
+    @click.option("--verbose", is_flag=True, help="[b]more[/] output")
+    def cli(verbose):
+        pass
+
+    @cli.command()
+    def hello():
+        """Say hello."""
+
+    @cli.command()
+    def bye():
+        """Say bye."""
+
+    return cli
+
+
+def test_trace_phases(runner, cli, traces):
+    result = runner.invoke(cli, ["--help"], color=True)
+    assert not result.exception
+    assert len(traces) == 1
+
+    help_trace = traces[0]
+    assert help_trace.command_path == "cli"
+    calls = {name: stats.calls for name, stats in help_trace.phases.items()}
+    assert calls == {
+        "formatter": 1,
+        "get_styles": 1,
+        "console": 1,
+        "compile_styles": 1,
+        "write_usage": 1,
+        "format_options": 1,
+        "format_commands": 1,
+        "get_command": 2,
+        "write_dl": 2,
+    }
+    assert help_trace.colorize_calls > 0
+    assert help_trace.colorize_bytes >= len("more output")
+    assert help_trace.seconds >= help_trace.phases["format_commands"].seconds
+
+    # the renderer is reused for the same styles
+    runner.invoke(cli, ["--help"], color=True)
+    assert traces[1].phases["get_styles"].calls == 0
+
+
+def test_trace_multi_command_get_command(runner, cli, traces):
+    class MultiCLI(StyledMultiCommand):
+        def list_commands(self, ctx):
+            return cli.list_commands(ctx)
+
+        def get_command(self, ctx, name):
+            return cli.get_command(ctx, name)
+
+    result = runner.invoke(MultiCLI(name="multi"), ["--help"])
+    assert not result.exception
+    assert traces[0].phases["get_command"].calls == 2
+
+
+def test_trace_plain_help(runner, cli, traces):
+    runner.invoke(cli, ["hello", "--help"])
+    assert [help_trace.command_path for help_trace in traces] == ["cli hello"]
+    assert traces[0].phases["console"].calls == 0
+    assert traces[0].phases["format_options"].calls == 1
+
+
+@pytest.mark.parametrize("color", [True, False])
+def test_trace_counts_extras(runner, traces, color):
+    @click.command(cls=StyledGroup)
+    @click.option("--name", default="x" * 100, show_default=True, required=True)
+    def cli(name):
+        pass
+
+    runner.invoke(cli, ["--help"], color=color)
+    assert traces[0].colorize_bytes >= len(f"default: {'x' * 100}; required")
+
+
+def test_trace_env_var(cli, monkeypatch, capsys):
+    cli.get_help(click.Context(cli, info_name="cli"))
+    assert capsys.readouterr().err == ""
+
+    monkeypatch.setenv(trace.TRACE_ENV_VAR, "1")
+    cli.get_help(click.Context(cli, info_name="cli"))
+    report = capsys.readouterr().err.splitlines()
+    assert report[0].startswith("Help trace for 'cli': ")
+    assert [line.split()[0] for line in report[1:]] == [*trace.PHASES, "_colorize"]
@@ -0,0 +1,83 @@
+import click
+import pytest
+
+from click_rich_help import HelpRecord, core, render_tree, tree
+
+
+@pytest.mark.parametrize("color", [True, False])
+def test_render_tree_matches_get_help(nested_cli, color):
+    pages = render_tree(nested_cli, widths=(50, 100), color=color)
+    assert sorted(pages) == ["cli", "cli plain", "cli sub", "cli sub leaf"]
+
+    for path, page in pages.items():
+        for width, help in page.items():
+            ctx = click.Context(
+                nested_cli, info_name="cli", color=color, terminal_width=width
+            )
+            for name in path.split()[1:]:
+                _, command, _ = ctx.command.resolve_command(ctx, [name])
+                ctx = click.Context(command, info_name=name, parent=ctx)
+            assert help == ctx.command.get_help(ctx)
+
+
+def test_render_tree_shares_records(nested_cli, monkeypatch):
+    calls = []
+    from_option = HelpRecord.from_option
+
+    def counted(option, ctx):
+        calls.append(option.name)
+        return from_option(option, ctx)
+
+    monkeypatch.setattr(HelpRecord, "from_option", counted)
+    pages = render_tree(nested_cli, widths=(60, 80, 100), include_hidden=True)
+    assert "cli secret" in pages
+    assert sorted(calls) == ["count", "help", "help", "help", "help", "name", "verbose"]
+
+
+def test_render_tree_resets_layouts(nested_cli, monkeypatch):
+    formatters = []
+
+    def new_formatter(*args):
+        formatters.append(core._new_formatter(*args))
+        return formatters[-1]
+
+    monkeypatch.setattr(tree, "_new_formatter", new_formatter)
+    render_tree(nested_cli, widths=(60, 80))
+    assert formatters
+    for formatter in formatters:
+        assert formatter._blocks == []
+        assert (formatter._min_width, formatter._max_width) == (0, None)
+
+
+MODULE = """
+import click
+
+from click_rich_help import StyledGroup
+
+
+@click.group(cls=StyledGroup, styles={"header": "red"})
+def cli():
+    pass
+
+
+for i in range(12):
+    cli.add_command(click.Command(f"cmd{i}", help=f"Command {i}."))
+"""
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_render_tree_jobs(write_module, executor):
+    write_module("tree_plugin", MODULE)
+    from tree_plugin import cli
+
+    expected = render_tree(cli, widths=(60, 80))
+    pages = render_tree(cli, widths=(60, 80), jobs=3, executor=executor)
+    assert list(pages) == list(expected)
+    assert pages == expected
+
+
+def test_render_tree_import_path(nested_cli):
+    with pytest.raises(ValueError, match="import path"):
+        render_tree(nested_cli, jobs=2)
+    with pytest.raises(ValueError, match="executor"):
+        render_tree(nested_cli, jobs=2, executor="fiber")
@@ -53,3 +53,30 @@ def test_custom_message(runner):
         "\x1b[37mexample\x1b[0m\x1b[90m \x1b[0m\x1b[32m1.0\x1b[0m",
         "\x1b[90m   python=3.7\x1b[0m",
     ]
+
+
+def test_prog_name_from_context(runner, monkeypatch):
+    @click.command()
+    @version_option(version="1.0", prog_name_style="red", message="%(prog)s 100%%")
+    def cli():
+        pass
+
+    result = runner.invoke(cli, ["--version"], prog_name="tool", color=True)
+    assert result.output == "\x1b[31mtool\x1b[0m 100%\n"
+
+    monkeypatch.setenv("NO_COLOR", "1")
+    result = runner.invoke(cli, ["--version"], prog_name="tool", color=True)
+    assert result.output == "tool 100%\n"
+
+
+def test_rich_styles(runner):
+    @click.command()
+    @version_option(
+        version="1.0", prog_name="example", version_style="#ff0000", message_style="dim"
+    )
+    def cli():
+        pass
+
+    result = runner.invoke(cli, ["--version"], color=True)
+    assert result.output.startswith("\x1b[2mexample\x1b[0m\x1b[2m, version \x1b[0m")
+    assert "1.0" in result.output and "\x1b[2m1.0" not in result.output
@@ -0,0 +1,86 @@
+import click
+import pytest
+from click.formatting import wrap_text
+
+from click_rich_help import StyledCommand
+from click_rich_help.utils import _wrap_styled
+
+RED = "\x1b[31m"
+BOLD = "\x1b[1m"
+RESET = "\x1b[0m"
+
+
+@pytest.fixture
+def cli():
+    @click.command(
+        cls=StyledCommand,
+        styles={"doc_style": "green", "info": "bold red"},
+    )
+    @click.argument("source", nargs=-1)
+    @click.argument("destination")
+    @click.option(
+        "--name",
+        default="world",
+        show_default=True,
+        required=True,
+        help="The [info]person[/info] to greet, who will be greeted loudly and "
+        "more than once if there is enough room to do so.",
+    )
+    def cli(**kwargs):
+        """
+        A [b]rather long[/b] docstring with [info]markup[/info] which has to be
+        wrapped at every width, followed by a second paragraph.
+
+        \b
+        An unwrapped
+        paragraph.
+        """
+
+    return cli
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        f"{RED}red words{RESET} and plain words {BOLD}then bold{RESET} again",
+        f"{RED}one very long red run of words which goes on and on{RESET}",
+        f"{RED}first line{RESET}\n{RED}second line{RESET}\n\n{BOLD}paragraph{RESET}",
+    ],
+)
+@pytest.mark.parametrize("width", [10, 20, 30])
+def test_layout_matches_plain_text(text, width):
+    wrapped = _wrap_styled(text, width, "  ", "  ", preserve_paragraphs=True)
+    assert click.unstyle(wrapped) == wrap_text(
+        click.unstyle(text), width, "  ", "  ", preserve_paragraphs=True
+    )
+    # no codes are carried over to the next line
+    for line in wrapped.split("\n"):
+        assert line.count(RESET) == line.count("\x1b[") - line.count(RESET)
+
+
+def test_codes_reopened_on_each_line():
+    wrapped = _wrap_styled(f"{RED}aaa bbb ccc{RESET}", 7)
+    assert wrapped == f"{RED}aaa bbb{RESET}\n{RED}ccc{RESET}"
+
+
+def test_base_style():
+    wrapped = _wrap_styled(f"{RED}aaa bbb{RESET}", 6, "  ", "  ", base_style=RED)
+    assert wrapped == f"{RED}  aaa{RESET}\n{RED}  bbb{RESET}"
+
+
+def test_other_escapes_left_to_click():
+    text = "\x1b]8;;https://example.com\x1b\\link\x1b]8;;\x1b\\ text"
+    assert _wrap_styled(text, 10) == wrap_text(text, 10)
+
+
+@pytest.mark.parametrize("width", [30, 45, 80])
+def test_styled_help_laid_out_as_plain(runner, cli, width):
+    styled = runner.invoke(cli, ["--help"], color=True, terminal_width=width)
+    plain = runner.invoke(cli, ["--help"], terminal_width=width)
+    assert not styled.exception
+    # lines which fit keep a trailing blank inside their codes
+    assert [line.rstrip() for line in click.unstyle(styled.output).splitlines()] == [
+        line.rstrip() for line in plain.output.splitlines()
+    ]
+    assert all(len(line) <= width for line in plain.output.splitlines() if " " in line)
+    assert "  An unwrapped\n  paragraph.\n" in plain.output